@@ -16,7 +16,10 @@ if sys.version_info.major < 3:
     # Refer to existing types in Python 2.
     long = long
     unicode = unicode
+    intern = intern
 else:
+    intern = sys.intern
+
     class long(int):
         pass
 
@@ -2051,12 +2054,18 @@ def _remove_cards(hdr, keywords):
     '''
        Astropy/new PyFITS cannot remove a HIERARCH keyword card properly.
        Remove it by making a shadow copy, clearing the original header,
-       then copying all but the removed cards back.
+       then copying all but the removed cards back.  Other cards are
+       deleted in place, without rebuilding the header.
 
               hdr: a fits.Header instance (Astropy.new PyFITS only)
          keywords: list of keys of cards to be removed
     '''
 
+    if not any(is_hierarch(card) for card in hdr.cards if card.keyword in keywords):
+        for keyword in keywords:
+            if keyword in hdr:
+                del hdr[keyword]
+        return
     shadow = hdr.copy()
     hdr.clear()
     hdr.update([card for card in shadow.cards if card.keyword not in keywords])
@@ -12,6 +12,31 @@ from .image import image
 from .pixelmap import pixelmap
 
 
+def _as_cube(data, index=0):
+    """
+       Return data as a 3-dimensional array without copying it.  Lower
+       dimensional data become a single plane, the index-th cube is
+       taken from 4-dimensional data.
+
+        data: A numeric Python array (i.e., NumPy array)
+       index: Which cube to take if data is 4-dimensional
+    """
+
+    data = Array.asanyarray(data)
+    shape = data.shape
+    if len(shape) == 1:
+        data = data.reshape(1, 1, shape[0])
+    elif len(shape) == 2:
+        data = data.reshape(1, shape[0], shape[1])
+    elif len(shape) == 3:
+        pass
+    elif len(shape) == 4:
+        data = data[index]
+    else:
+        raise DARMAError('Cubes with %d dimensions are not supported!' % len(shape))
+    return data
+
+
 class cube(DataStruct):
 
     """
@@ -37,7 +62,9 @@ class cube(DataStruct):
         """
              filename: The name of a FITS file the cube can be loaded from
             extension: A FITS extension number
-                 data: A 3-dim numeric Python array (i.e., NumPy array)
+                 data: A 3-dim numeric Python array (i.e., NumPy array),
+                       used without copying (e.g., planes already
+                       stacked instead of an image_list)
            image_list: A list of images or pixelmaps
                 index: Which cube to take if data is 4-dimensional (e.g., a
                        radio cube with polarization)
@@ -51,7 +78,9 @@ class cube(DataStruct):
 
         self.filename = filename or None
         self.extension = extension
-        self._data = data
+        self._data = None
+        if data is not None:
+            self._data = _as_cube(data, index)
         self.image_list = image_list
         self.index = index
         self.readonly = readonly
@@ -80,7 +109,6 @@ class cube(DataStruct):
 
             filename = self.filename
             extension = self.extension
-            data = self._data
             image_list = self.image_list
             index = self.index
             readonly = self.readonly
@@ -91,26 +119,13 @@ class cube(DataStruct):
                     _data = fits_open(filename, memmap=memmap)[extension].data
                 except Exception as e:
                     raise DARMAError('Unable to load data from %s : %s' % (filename, e))
-            elif data:
-                _data = data
-                del data
             elif image_list:
                 _data = Array.concatenate([ima.data for ima in image_list]).reshape(
                     len(image_list), ima.data.shape[0], ima.data.shape[1])
             else:
                 _data = None
             if _data is not None:
-                shape = _data.shape
-                if len(shape) == 1:
-                    _data = _data.reshape(1, 1, shape[0])
-                elif len(shape) == 2:
-                    _data = _data.reshape(1, shape[0], shape[1])
-                elif len(shape) == 3:
-                    pass
-                elif len(shape) == 4:
-                    _data = _data[index]
-                else:
-                    raise DARMAError('Cubes with %d dimensions are not supported!' % len(shape))
+                _data = _as_cube(_data, index)
             self._data = _data
 
     def as_image_list(self):
@@ -172,16 +172,10 @@ class header(object):
         """
 
         if self._hdr is not None:
-            allowed_chars = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_'
             for card in get_cards(self._hdr):
-                attr = get_keyword(card).replace('-', '_')
-                if attr not in ['COMMENT', 'HISTORY', ''] and not hasattr(self, attr):
-                    for char in attr.upper():
-                        if char not in allowed_chars:
-                            attr = attr.replace(char, '_')
-                    if is_hierarch(card):
-                        attr = 'HIERARCH_%s' % attr
-                    setattr(self, attr, card)
+                keyword = get_keyword(card)
+                if keyword not in ['COMMENT', 'HISTORY', ''] and not hasattr(self, keyword.replace('-', '_')):
+                    setattr(self, _attribute_name(keyword, is_hierarch(card)), card)
 
     def _get_hdr(self):
         """
@@ -208,6 +202,8 @@ class header(object):
 
         del self._hdr, self.cards
         self._hdr = None
+        # A reloaded header must be verified again.
+        self._IS_VERIFIED = False
 
     hdr = property(_get_hdr, _set_hdr, _del_hdr,
                    'Attribute to store the header')
@@ -306,7 +302,9 @@ class header(object):
            Save header to a text file.  The contents of filename will be
            overwritten if mode='clobber'.
 
-           filename: mandatory name of the file to be written
+           filename: mandatory name of the file to be written, or an open
+                     file object (e.g., io.BytesIO if raw) written at its
+                     current position (mode is then ignored)
                 raw: write file as a raw, FITS-compatible file in binary
                      mode with 2880 byte blocks (if False, write a text
                      file)
@@ -327,8 +325,10 @@ class header(object):
         if mode == 'append':
             mode = {True: 'ab', False:  'a'}
 
+        is_file = hasattr(filename, 'write')
+
         hdr = self.copy()
-        if hdr.filename is None:
+        if hdr.filename is None and not is_file:
             hdr.filename = filename
 
         linelen = hdr.item_size()
@@ -352,8 +352,11 @@ class header(object):
         else:
             cardlist = ['%s\n' % get_cardimage(card) for card in hdr.itercards()]
             cardlist.append('END%s\n' % (' ' * (linelen - 3)))
-        with open(filename, mode[raw]) as fd:
-            fd.writelines(cardlist)
+        if is_file:
+            filename.writelines(cardlist)
+        else:
+            with open(filename, mode[raw]) as fd:
+                fd.writelines(cardlist)
 
     def verify(self, option='silentfix'):
         """
@@ -473,16 +476,18 @@ class header(object):
                     n += 1
             if extend is not None:
                 update_header(hdr, get_keyword(extend), extend.value, extend.comment, after='NAXIS%s' % n)
+            # FIXME find out why this is necessary
+            # Only needed once per verification: the cards are not
+            # changed again until _IS_VERIFIED is reset.
+            if option == 'silentfix':
+                for keyword in hdr.keys():
+                    try:
+                        value = hdr[keyword]
+                    except ValueError as e:
+                        hdr.__delitem__(keyword)
+            # FIXME
             self._hdr = hdr
             self._IS_VERIFIED = True
-        # FIXME find out why this is necessary
-        if option == 'silentfix' and self._hdr is not None:
-            for keyword in self._hdr.keys():
-                try:
-                    value = self._hdr[keyword]
-                except ValueError as e:
-                    self._hdr.__delitem__(keyword)
-        # FIXME
         self._set_attributes()
 
     def as_eclipse_header(self):
@@ -835,9 +840,13 @@ class header(object):
                  the end of the header.
         """
 
+        # Work on the header as it stands: going through self.hdr would
+        # verify the whole header again after every append.
+        if self._hdr is None:
+            self.load()
         last_keyword = None
         if force:
-            last_keyword = len(self.cards) - 1
+            last_keyword = len(get_cards(self._hdr)) - 1
         try:
             if keyword == 'COMMENT':
                 self.add_comment(value, after=last_keyword)
@@ -846,7 +855,7 @@ class header(object):
             elif keyword == '':
                 self.add_blank(value, after=last_keyword)
             else:
-                if keyword in self:
+                if _strip_keyword(keyword) in self._hdr:
                     del self[keyword]
                 self.update(keyword, value, comment=comment, after=last_keyword)
         except Exception as e:
@@ -916,6 +925,8 @@ class header(object):
         result = header()
         result.hdr = self.hdr.copy()
         result.option = self.option
+        # The copied cards have been verified along with this header.
+        result._IS_VERIFIED = self._IS_VERIFIED
         if not isinstance(result.hdr, fits.Header):
             raise DARMAError('Error copying header!')
         return result
@@ -1042,13 +1053,7 @@ class header(object):
         # XXX explore setting COMMENT, HISTORY, and BLANK cards to the
         # XXX corresponding attribute
         if get_keyword(card) not in ['COMMENT', 'HISTORY', '']:
-            attr = get_keyword(card).replace('-', '_')
-            for char in attr.upper():
-                if char not in allowed_chars:
-                    attr = attr.replace(char, '_')
-            if is_hierarch(card):
-                attr = 'HIERARCH_%s' % attr
-            setattr(self, attr, card)
+            setattr(self, _attribute_name(get_keyword(card), is_hierarch(card)), card)
         self._IS_VERIFIED = False
 
     def __delitem__(self, keyword):
@@ -1454,6 +1459,41 @@ def update_header_in_file(filename, keywords=[], values=[], comments=[], ext=0,
     os.rename(filename+'.new', filename)
 
 
+# Attribute names of card keywords, filled by _attribute_name().  It is
+# emptied when it reaches _MAX_ATTRIBUTE_NAMES entries, so it does not
+# grow with every keyword a long running process sees.
+_ATTRIBUTE_NAMES = {}
+_MAX_ATTRIBUTE_NAMES = 1024
+
+
+def _attribute_name(keyword, hierarch=False):
+    """
+       Return the attribute name of a card keyword.  Characters other
+       than letters, digits, and '_' are replaced by '_' and HIERARCH
+       keywords are prefixed by 'HIERARCH_'.  Names are computed once
+       per keyword as headers set their attributes on every access.
+
+          keyword: card keyword (without 'HIERARCH ')
+         hierarch: the keyword is that of a HIERARCH card
+    """
+
+    try:
+        return _ATTRIBUTE_NAMES[keyword, hierarch]
+    except KeyError:
+        pass
+    allowed_chars = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_'
+    attr = keyword.replace('-', '_')
+    for char in attr.upper():
+        if char not in allowed_chars:
+            attr = attr.replace(char, '_')
+    if hierarch:
+        attr = 'HIERARCH_%s' % attr
+    if len(_ATTRIBUTE_NAMES) >= _MAX_ATTRIBUTE_NAMES:
+        _ATTRIBUTE_NAMES.clear()
+    _ATTRIBUTE_NAMES[keyword, hierarch] = attr
+    return attr
+
+
 def _is_card_length(card_string):
     """
        str <= 80 characters
@@ -1635,20 +1675,21 @@ def fromstring(cardstring, verify='silentfix'):
 
     # valid cards have:
     # 1. '=' at index 8 or          # standard KEYWORD card
-    std, stdmsg = _is_standard_form(cardstring)
     # 2. begin with 'HIERARCH ' or  # HIERARCH keyword card
-    hei, heimsg = _is_hierarch_form(cardstring)
     # 3. begin with '        ' or   # BLANK card
-    bla, blamsg = _is_blank_form(cardstring)
     # 4. begin with 'COMMENT ' or   # COMMENT card
-    com, commsg = _is_comment_form(cardstring)
     # 5. begin with 'HISTORY ' or   # HISTORY card
-    his, hismsg = _is_history_form(cardstring)
     # 6. begin with 'CONTINUE'      # CONTINUE card
-    con, conmsg = _is_continue_form(cardstring)
-    if not (std or hei or bla or com or his or con):
-        msglist = [stdmsg, heimsg, blamsg, commsg, hismsg, conmsg]
-        msglist = [msg for msg in msglist if msg]
+    # The forms are checked in turn until one matches (most cards are
+    # standard cards).
+    msglist = []
+    for is_form in [_is_standard_form, _is_hierarch_form, _is_blank_form,
+                    _is_comment_form, _is_history_form, _is_continue_form]:
+        valid, msg = is_form(cardstring)
+        if valid:
+            break
+        msglist.append(msg)
+    else:
         raise DARMAError('ERROR -- Incorrectly formatted cardstring (%s): %s' % (cardstring, ', '.join(msglist)))
     card = fits.Card().fromstring(cardstring)
     card.verify(option=verify)
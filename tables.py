@@ -5,9 +5,12 @@ __version__ = '@(#)$Revision$'
 
 import math
 import os
+from collections import OrderedDict
+from contextlib import contextmanager
+from itertools import islice
 
 from .common import fits, Array
-from .common import DARMAError, _HAS_NUMPY, fits_open, get_cards
+from .common import DARMAError, _HAS_NUMPY, fits_open, get_cards, intern
 from .header import header
 
 datatypes = {
@@ -27,6 +30,45 @@ fits_format = {
                'complex128': 'M',
 }
 
+# fits_format keyed on NumPy dtype instances (a single dictionary lookup
+# without building the dtype name).  Names NumPy does not understand are
+# only available through fits_format.
+_DTYPE_TO_FITS = {}
+if _HAS_NUMPY:
+    for _name, _format in fits_format.items():
+        try:
+            _DTYPE_TO_FITS[Array.dtype(_name)] = _format
+        except TypeError:
+            pass
+    del _name, _format
+
+
+def _get_fits_format(dtype):
+    """
+       Return the FITS column format for a NumPy dtype.
+
+       dtype: a NumPy dtype instance
+    """
+
+    try:
+        return _DTYPE_TO_FITS[dtype]
+    except KeyError:
+        # e.g., non-native byte order ('>f4')
+        return fits_format[dtype.name]
+
+
+def _update_table(table):
+    """
+       Update a table HDU after its columns have been added or deleted.
+       Astropy keeps table HDUs up to date itself and has no update()
+       method.
+
+       table: a table HDU
+    """
+
+    if hasattr(table, 'update'):
+        table.update()
+
 
 class columns(object):
 
@@ -34,6 +76,13 @@ class columns(object):
        A container object housing a list of columns, a table.
     """
 
+    # Column attributes are kept in _col_attrs, so a fixed set of slots
+    # suffices.
+    __slots__ = ('filename', '_name', 'datatype', 'readonly', 'memmap',
+                 'hdus', 'table', '_raw_header', '_header', '_dirty_schema',
+                 '_soa_cache', '_col_attrs', '_batch',
+                 '__weakref__')
+
     def __init__(self, filename=None, name=None, datatype='binary',
                  readonly=1, memmap=0):
         """
@@ -53,6 +102,7 @@ class columns(object):
         if not _HAS_NUMPY:
             raise DARMAError('DARMA table functionality not possible: cannot import module numpy')
 
+        self._col_attrs = {}
         self.filename = filename
         self._name = name
         self.datatype = datatype
@@ -60,6 +110,11 @@ class columns(object):
         self.memmap = memmap
         self.hdus = fits.HDUList()
         self.table = None
+        self._raw_header = None
+        self._header = None
+        self._dirty_schema = False
+        self._soa_cache = {}
+        self._batch = None
 
         if self.filename is not None:
             if not os.path.exists(self.filename):
@@ -85,26 +140,39 @@ class columns(object):
                 try:
                     self.hdus = fits_open(self.filename, memmap=self.memmap)
                     self.table = self.hdus[self._name]
-                    cardlist = list(get_cards(self.table.header))
-                    self.header = header(cardlist=cardlist)
+                    # The DARMA header is built from this on first use.
+                    self._raw_header = self.table.header
                 except Exception as e:
+                    # Do not leave the file open after a failed load.
+                    self.hdus.close()
+                    self.hdus = fits.HDUList()
+                    self.table = None
                     raise DARMAError('Error loading table from %s: %s' % (self.filename, e))
-            for name in self.names:
-                if not hasattr(self, name):
-                    setattr(self, name, name)
+                # Interned names make the repeated dictionary lookups
+                # of column names cheaper.
+                for name in self.table.columns.names:
+                    if isinstance(name, str):
+                        name = intern(name)
+                        self._col_attrs[intern(name.replace(' ', '_'))] = name
+                    else:
+                        self._col_attrs[name.replace(' ', '_')] = name
 
-    def __getattribute__(self, name):
+    def __getattr__(self, name):
         """
-           x.__getattribute__('name') <==> x.name
+           x.__getattr__('name') <==> x.name
 
-           For a column name, this returns the data of one column if
-           that column's name requested.
+           For a column name (spaces replaced by underscores), this
+           returns the data of that column.  Only called when normal
+           attribute lookup fails, so other attributes are not slowed
+           down by the column lookup.
         """
 
-        if object.__getattribute__(self, name) in [name, name.replace('_', ' ')]:
-            return self.table.data.field(name)
-        else:
-            return object.__getattribute__(self, name)
+        try:
+            colname = object.__getattribute__(self, '_col_attrs')[name]
+        except (AttributeError, KeyError):
+            raise AttributeError('%s object has no attribute %s' % (self.__class__.__name__, name))
+        self.sync()
+        return self.table.data.field(colname)
 
     def __getitem__(self, name):
         """
@@ -115,9 +183,42 @@ class columns(object):
         """
 
         if self.table is not None:
-            attrname = name.replace(' ', '_')
             if name in self.names:
-                return getattr(self, attrname)
+                self.sync()
+                return self.table.data.field(name)
+
+    def _is_column_attr(self, attrname):
+        """
+           Return if attrname is the attribute name of a column.  The
+           slots, properties and methods of columns take precedence over
+           column names, so e.g. a column named 'table' is only
+           accessible as x['table'].
+        """
+
+        return not hasattr(type(self), attrname) and attrname in self._col_attrs
+
+    def _set_column(self, name, value):
+        """
+           Set the data of the existing column named name.
+        """
+
+        # Writing into an existing column does not change the table
+        # structure, so no update of the table is needed.
+        self.sync()
+        # NumPy casts (and byte swaps) while copying into the column,
+        # so no converted temporary array is made here.
+        self.table.data.field(name)[...] = value
+        self._soa_cache.pop(name, None)
+
+    def _del_column(self, attrname):
+        """
+           Delete the column with attribute name attrname.
+        """
+
+        colname = self._col_attrs.pop(attrname)
+        if self.table is not None and colname in self.names:
+            self.table.columns.del_col(colname)
+            self._dirty_schema = True
 
     def __setattr__(self, name, value):
         """
@@ -127,9 +228,8 @@ class columns(object):
            that column's name requested.
         """
         attrname = name.replace(' ', '_')
-        if hasattr(self, attrname) and object.__getattribute__(self, attrname) == name:
-            self.table.data.field(name)[:] = value
-            self.table.update()
+        if self._is_column_attr(attrname):
+            self._set_column(self._col_attrs[attrname], value)
         else:
             object.__setattr__(self, attrname, value)
 
@@ -142,11 +242,18 @@ class columns(object):
 
         if self.table is not None:
             attrname = name.replace(' ', '_')
-            if hasattr(self, attrname):
-                self.__setattr__(attrname, value)
+            if attrname in self._col_attrs:
+                self._set_column(self._col_attrs[attrname], value)
             else:
-                self.table.column.add_col(fits.Column(name, fits_format[value.dtype.name], array=value))
-                setattr(self, attrname, name)
+                column = fits.Column(name, _get_fits_format(value.dtype), array=value)
+                if self._batch is not None:
+                    # Added when the batch_add() block ends (the last
+                    # column set with a name replaces earlier ones).
+                    self._batch[name] = column
+                    return
+                self.table.columns.add_col(column)
+                self._dirty_schema = True
+                self._col_attrs[attrname] = name
 
     def __delattr__(self, name):
         """
@@ -155,10 +262,10 @@ class columns(object):
            For a column name, delete the data in the column named name.
         """
 
-        if self.table is not None and name in self.names:
-            self.table.columns.del_col(name)
-            self.table.update()
-        object.__delattr__(self, name)
+        if self._is_column_attr(name):
+            self._del_column(name)
+        else:
+            object.__delattr__(self, name)
 
     def __delitem__(self, name):
         """
@@ -168,10 +275,124 @@ class columns(object):
         """
 
         if self.table is not None:
-            if hasattr(self, name):
-                if name in self.names:
-                    self.table.columns.del_col(name)
-                delattr(self, name)
+            attrname = name.replace(' ', '_')
+            if attrname in self._col_attrs:
+                self._del_column(attrname)
+
+    def sync(self):
+        """
+           Update the table after columns have been added or deleted.
+
+           Only changes to the structure of the table require an update,
+           so it is postponed until the column data are next accessed.
+        """
+
+        if self._dirty_schema and self.table is not None:
+            _update_table(self.table)
+            self._soa_cache.clear()
+        self._dirty_schema = False
+
+    @contextmanager
+    def batch_add(self):
+        """
+           Context manager collecting the new columns set in its block
+           and adding them to the table together when the block ends.
+           Adding a column to a table rebuilds all of its data, so the
+           table is rebuilt once with all new columns instead:
+
+               with cols.batch_add():
+                   for name, array in arrays.items():
+                       cols[name] = array
+
+           New columns are not accessible until the block ends and are
+           discarded if it raises an exception.  A nested block adds its
+           columns to the batch of the outermost block.
+        """
+
+        self.load()
+        if self._batch is not None:
+            yield self
+            return
+        self._batch = OrderedDict()
+        try:
+            yield self
+            batch = self._batch
+        finally:
+            self._batch = None
+        if batch:
+            self._add_columns(list(batch.values()))
+
+    def _add_columns(self, new_columns):
+        """
+           Replace the table by a table built once from its columns and
+           new_columns.
+
+           new_columns: list of fits.Column objects
+        """
+
+        self.sync()
+        coldefs = self.table.columns + fits.ColDefs(new_columns)
+        table_type = type(self.table)
+        try:
+            table = table_type.from_columns(coldefs, header=self.table.header)
+        except AttributeError:
+            # PyFITS < 3.3
+            table = fits.new_table(coldefs, header=self.table.header, tbtype=table_type.__name__)
+        if self.table in self.hdus:
+            self.hdus[self.hdus.index(self.table)] = table
+        self.table = table
+        self._raw_header = table.header
+        for column in new_columns:
+            self._col_attrs[column.name.replace(' ', '_')] = column.name
+        self._soa_cache.clear()
+
+    def to_soa(self, names=None):
+        """
+           Return a dictionary of contiguous copies of column data keyed
+           by column name.
+
+           The columns of a FITS table are interleaved row by row, so
+           vector operations repeated on a column run faster on a
+           contiguous copy.  The copies are cached until the columns are
+           set or the table structure changes; changes made directly
+           through the arrays returned by x[name] are not seen.  The
+           copies are shared by all calls, so they are read-only.
+
+           names: list of column names (all columns if None)
+        """
+
+        self.load()
+        if names is None:
+            names = self.names
+        self.sync()
+        soa = {}
+        for name in names:
+            if name not in self._soa_cache:
+                # A copy even if the column is contiguous already.
+                column = Array.array(self.table.data.field(name), order='C')
+                column.flags.writeable = False
+                self._soa_cache[name] = column
+            soa[name] = self._soa_cache[name]
+        return soa
+
+    def rows(self, start=0, stop=None):
+        """
+           Return a dictionary of contiguous copies of the column data
+           of rows start to stop (a slice) keyed by column name.
+
+           Use this instead of looping over rows in Python; each column
+           is copied once and can be used in vector operations.
+
+           start: index of the first row
+            stop: index after the last row (the last row if None)
+        """
+
+        self.load()
+        self.sync()
+        data = self.table.data[start:stop]
+        # Copies even if the columns are contiguous already.
+        return dict((name, Array.array(data.field(name), order='C'))
+                    for name in self.names)
 
     def __del__(self):
         """
@@ -180,11 +401,14 @@ class columns(object):
            Remove the table and close the HDUList.
         """
 
-        if self.table is not None:
+        # A failed __init__ may leave these unset.
+        if getattr(self, 'table', None) is not None:
             if hasattr(self.table, 'data'):
                 del self.table.data
         self.table = None
-        self.hdus.close()
+        hdus = getattr(self, 'hdus', None)
+        if hdus is not None:
+            hdus.close()
 
     def _get_names(self):
         """
@@ -224,11 +448,38 @@ class columns(object):
         if not self.table:
             self.load()
         self.table.name = value
-        self.table.update()
+        _update_table(self.table)
         self.header['EXTNAME'] = self.table.header.get('EXTNAME')
 
     name = property(_get_name, _set_name, None, 'Name of the table holding the columns.')
 
+    def _get_header(self):
+        """
+           Header of the table holding the columns.  The header object
+           is only created when it is first requested.
+
+           getter function
+        """
+
+        if self._header is None:
+            if self._raw_header is None:
+                self.load()
+            if self._raw_header is not None:
+                cardlist = list(get_cards(self._raw_header))
+                self._header = header(cardlist=cardlist)
+        return self._header
+
+    def _set_header(self, value):
+        """
+           Header of the table holding the columns.
+
+           setter function
+        """
+
+        self._header = value
+
+    header = property(_get_header, _set_header, None, 'Header of the table holding the columns.')
+
     def info(self):
         """
            Display helpful info about the columns.
@@ -283,6 +534,10 @@ class tables(list):
     """
     """
 
+    __slots__ = ('filename', 'table_ids', 'indexes', 'datatype', 'readonly',
+                 'memmap', '_tables', '_names', '_names_set', '_attrnames',
+                 '_dict', '_info_cache', '__weakref__')
+
     def __init__(self, filename=None, table_ids=[], indexes=[],
                  datatype='binary', readonly=1, memmap=0):
         """
@@ -312,7 +567,10 @@ class tables(list):
         self.memmap = memmap
         self._tables = []
         self._names = []
+        self._names_set = set()
+        self._attrnames = {}
         self._dict = {}
+        self._info_cache = None
 
         if self.filename is not None:
             if not os.path.exists(self.filename):
@@ -334,36 +592,45 @@ class tables(list):
         """
 
         if self._tables == []:
+            table_names = []
             if self.filename is not None:
                 try:
+                    # Only the HDU names are needed here, so the file is
+                    # closed again before any table is loaded.
+                    # The names are taken from the (index, name, ...)
+                    # rows of the HDU summary.  Building it still reads
+                    # every extension header.
                     hdus = fits_open(self.filename, memmap=self.memmap)
+                    try:
+                        hdu_info = hdus.info(output=False)
+                    finally:
+                        hdus.close()
                     if self.table_ids:
-                        hdu_names = [hdu.name for hdu in hdus][1:]
+                        hdu_names = set(row[1] for row in islice(hdu_info, 1, None))
                         table_names = [id for id in self.table_ids if id in hdu_names]
                     elif self.indexes:
-                        hdu_indexes = list(range(1, len(hdus)))
-                        table_names = [hdus[idx].name for idx in self.indexes if idx in hdu_indexes]
+                        table_names = [hdu_info[idx][1] for idx in self.indexes
+                                       if 0 < idx < len(hdu_info)]
                     else:
-                        table_names = [hdu.name for hdu in hdus][1:]
-                    self._tables = []
-                    for table_name in table_names:
-                        cols = columns(filename=self.filename,
-                                       name=table_name,
-                                       datatype=self.datatype,
-                                       readonly=self.readonly,
-                                       memmap=self.memmap)
-                        self._tables.append(cols)
-                    hdus.close()
+                        table_names = [row[1] for row in islice(hdu_info, 1, None)]
                 except Exception as e:
                     raise DARMAError('Error loading tables from %s: %s' % (self.filename, e))
 
-            self._names = [cols.name for cols in self._tables]
-
-            for cols in self._tables:
-                self._dict[cols.name] = cols
-                attrname = cols.name.replace(' ', '_')
-                if not hasattr(self, attrname):
-                    setattr(self, attrname, cols)
+            # The columns are unloaded stubs; each one opens the file
+            # only when its data are first accessed.
+            self._tables = []
+            for table_name in table_names:
+                cols = columns(filename=self.filename,
+                               name=table_name,
+                               datatype=self.datatype,
+                               readonly=self.readonly,
+                               memmap=self.memmap)
+                self._tables.append(cols)
+                self._dict[table_name] = cols
+
+            self._names = table_names
+            self._names_set = set(table_names)
+            self._set_attrnames()
 
     def _get_tables(self):
         """
@@ -377,13 +644,17 @@ class tables(list):
         """
         """
 
-        if isinstance(value, list):
-            for val in value:
-                if not isinstance(val, columns):
-                    raise DARMAError('Cannot set tables to object of type: %s' % type(val))
-            self._tables = value
-        else:
+        # Round trip (x.tables = x.tables): already validated.
+        if value is self._tables:
+            return
+        try:
+            value = list(value)
+        except TypeError:
             raise DARMAError('Cannot set tables to object of type: %s' % type(value))
+        invalid = [val for val in value if not isinstance(val, columns)]
+        if invalid:
+            raise DARMAError('Cannot set tables to object of type: %s' % type(invalid[0]))
+        self._tables = value
 
     def _del_tables(self):
         """
@@ -406,57 +677,113 @@ class tables(list):
         """
 
         self._names = value
+        self._names_set = set(value)
+        self._set_attrnames()
 
     def _del_names(self):
         """
         """
 
         self._names = []
+        self._names_set = set()
+        self._attrnames = {}
 
     names = property(_get_names, _set_names, _del_names)
 
+    def _set_attrnames(self):
+        """
+           Map the attribute names of the tables (spaces in table names
+           are replaced by underscores) to the table names.  The first
+           table with an attribute name gets it.
+        """
+
+        self._attrnames = {}
+        for name in self._names:
+            self._attrnames.setdefault(name.replace(' ', '_'), name)
+
+    def _get_attrname(self, attrname):
+        """
+           Return the name of the table accessible as attribute attrname
+           (a dictionary lookup), or None.
+        """
+
+        if self._tables == []:
+            self.load()
+        return self._attrnames.get(attrname)
+
+    def __getattr__(self, attrname):
+        """
+           x.__getattr__('name') <==> x.name
+
+           For a table name (spaces replaced by underscores), return the
+           columns of that table, loading them on first access.  Only
+           called when normal attribute lookup fails.
+        """
+
+        if attrname.startswith('_'):
+            raise AttributeError(attrname)
+        name = self._get_attrname(attrname)
+        if name is None:
+            raise AttributeError('%s object has no attribute %s' % (self.__class__.__name__, attrname))
+        cols = self._dict[name]
+        cols.load()
+        return cols
+
+    def _has_name(self, name):
+        """
+           Return if name is the name of a table (a set lookup).
+        """
+
+        if self._tables == []:
+            self.load()
+        return name in self._names_set
+
     def __getitem__(self, name):
         """
         """
 
-        if name in self.names:
-            return self._dict[name]
+        if self._has_name(name):
+            cols = self._dict[name]
         elif isinstance(name, int):
-            return self._dict[self.names[name]]
+            cols = self._dict[self.names[name]]
         else:
             return None
+        cols.load()
+        return cols
 
     def __setitem__(self, name, value):
         """
         """
 
-        if name not in self.names:
-            self.names.append(name)
+        if not self._has_name(name):
+            self._names.append(name)
+            self._names_set.add(name)
+            self._attrnames.setdefault(name.replace(' ', '_'), name)
         self._dict[name] = value
-        attrname = name.replace(' ', '_')
-        if not hasattr(self, attrname):
-            setattr(self, attrname, value)
 
     def __delitem__(self, name):
         """
         """
 
-        if name in self.names:
-            name = self.names.pop(self.names.index(name))
+        if self._has_name(name):
+            self._names.remove(name)
         else:
-            name = self.names.pop(name)
+            name = self._names.pop(name)
+        self._names_set.discard(name)
+        self._set_attrnames()
         del self._dict[name]
-        if hasattr(self, name):
-            delattr(self, name)
 
     def __delattr__(self, name):
         """
         """
 
-        if name in self.names:
-            name = self.names.pop(self.names.index(name))
-            del self._dict[name]
-        list.__delattr__(self, name)
+        table_name = None
+        if not hasattr(type(self), name):
+            table_name = self._get_attrname(name)
+        if table_name is None:
+            list.__delattr__(self, name)
+        else:
+            del self[table_name]
 
     def __repr__(self):
         """
@@ -474,7 +801,7 @@ class tables(list):
         """
         """
 
-        return name in self.names
+        return self._has_name(name)
 
     def __iter__(self):
         """
@@ -485,20 +812,55 @@ class tables(list):
 
         return iter(self.names)
 
+    def _get_info(self):
+        """
+           Return a dictionary of (rows, columns) shapes of the tables in
+           filename read from the table headers, so no table data are
+           loaded.  The result is cached, so it does not follow changes
+           of loaded tables (see _get_shape()).
+        """
+
+        if self._info_cache is None:
+            info = {}
+            if self.filename is not None:
+                hdus = fits_open(self.filename, memmap=self.memmap)
+                for hdu in hdus[1:]:
+                    hdr = hdu.header
+                    info[hdu.name] = (hdr.get('NAXIS2', 0), hdr.get('TFIELDS', 0))
+                hdus.close()
+            self._info_cache = info
+        return self._info_cache
+
+    def _get_shape(self, name):
+        """
+           Return the (rows, columns) shape of the table name.  A loaded
+           table may have had columns added or deleted, so its own shape
+           is used.  The shapes of other tables are read from the file.
+        """
+
+        cols = self._dict[name]
+        if cols.table is not None:
+            return (cols.table.header.get('NAXIS2', 0), len(cols.table.columns))
+        return self._get_info().get(name)
+
     def info(self):
         """
+           Display helpful info about the tables.
         """
 
-        n = 0
         print(' %s\t%20s\t%15s\t%12s' % ('No.', 'Name', 'Type', 'Shape'))
-        for name in self.names:
-            print(' % 2d\t%20s\t%15s\t%12s' % (n, name, self._dict[name].__class__.__name__, self._dict[name].shape()))
-            n += 1
+        for n, name in enumerate(self.names):
+            cols = self._dict[name]
+            shape = self._get_shape(name)
+            print(' % 2d\t%20s\t%15s\t%12s' % (n, name, cols.__class__.__name__, shape or ''))
 
     def __del__(self):
         """
            Make sure all the HDUs are closed properly.
         """
 
-        for name in self.names:
-            delattr(self, name)
+        self._dict.clear()
+        self._tables = []
+        self._names = []
+        self._names_set = set()
+        self._attrnames = {}
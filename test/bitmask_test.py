@@ -11,59 +11,46 @@ from .common_test import fits, Array
 import unittest
 import os
 import collections
+import shutil
+import tempfile
 
-SINGLE1 = 'SEF1.fits'
-SINGLE2 = 'SEF2.fits'
-#SINGLES = [SINGLE1, SINGLE2]
-SINGLES = [SINGLE1]
-MULTI1 = 'MEF1.fits'
-MULTI2 = 'MEF2.fits'
-#MULTIS = [MULTI1, MULTI2]
-MULTIS = [MULTI1]
-CUBE1 = 'CUBE1.fits'
-CUBE2 = 'CUBE2.fits'
-#CUBES = [CUBE1, CUBE2]
-CUBES = [CUBE1]
-EMPTY1 = 'EMPTY1.fits'
-EMPTY2 = 'EMPTY2.fits'
-#EMPTYS = [EMPTY1, EMPTY2]
-EMPTYS = [EMPTY1]
-ZERO1 = 'ZERO1.fits'
-ZERO2 = 'ZERO2.fits'
-#ZEROS = [ZERO1, ZERO2]
-ZEROS = [ZERO1]
-ONE1 = 'ONE1.fits'
-ONE2 = 'ONE2.fits'
-#ONES = [ONE1, ONE2]
-ONES = [ONE1]
-FILENAMES = SINGLES + MULTIS + EMPTYS + CUBES + ZEROS + ONES
-
-
-def build_test_data_sef():
+# The test data are built once per module in a directory created by
+# setUpModule(), which then sets the file names (set_test_filenames()).
+TEST_DIR = None
+
+
+def set_test_filenames():
     """
-       This function builds SEF files to be used in testing
+       This function sets the names of the files used in testing to
+       files in TEST_DIR
     """
-    data = Array.random.normal(1.0, 0.5, (32, 16)).astype('float32')
-    for filename in SINGLES:
-        fits.PrimaryHDU(data=data).writeto(filename, output_verify='silentfix', clobber=True)
+    global EMPTY1, EMPTY2, EMPTYS
+    global ZERO1, ZERO2, ZEROS
+    global ONE1, ONE2, ONES
+    EMPTY1 = os.path.join(TEST_DIR, 'EMPTY1.fits')
+    EMPTY2 = os.path.join(TEST_DIR, 'EMPTY2.fits')
+    #EMPTYS = [EMPTY1, EMPTY2]
+    EMPTYS = [EMPTY1]
+    ZERO1 = os.path.join(TEST_DIR, 'ZERO1.fits')
+    ZERO2 = os.path.join(TEST_DIR, 'ZERO2.fits')
+    #ZEROS = [ZERO1, ZERO2]
+    ZEROS = [ZERO1]
+    ONE1 = os.path.join(TEST_DIR, 'ONE1.fits')
+    ONE2 = os.path.join(TEST_DIR, 'ONE2.fits')
+    #ONES = [ONE1, ONE2]
+    ONES = [ONE1]
 
 
-def build_test_data_mef():
+def write_test_data(hdus, filename):
     """
-       This function builds MEF files to be used in testing
+       This function writes an HDU or HDUList to filename, overwriting
+       an existing file
     """
-    data = Array.random.normal(1.0, 0.5, (32, 16)).astype('float32')
-    for filename in MULTIS:
-        hdu0 = fits.PrimaryHDU()
-        hdu1 = fits.ImageHDU(data=data)
-        update_header(hdu1.header, 'EXTNAME', 'EXT1')
-        hdu2 = fits.ImageHDU(data=data)
-        update_header(hdu2.header, 'EXTNAME', 'EXT2')
-        hdu3 = fits.ImageHDU(data=data)
-        update_header(hdu3.header, 'EXTNAME', 'EXT3')
-        hdus = fits.HDUList([hdu0, hdu1, hdu2, hdu3])
+    try:
+        hdus.writeto(filename, output_verify='silentfix', overwrite=True)
+    except TypeError:
+        # PyFITS and old Astropy versions only know clobber
         hdus.writeto(filename, output_verify='silentfix', clobber=True)
-        hdus.close()
 
 
 def build_test_data_empty():
@@ -71,7 +58,7 @@ def build_test_data_empty():
        This function builds dataless files to be used in testing
     """
     for filename in EMPTYS:
-        fits.PrimaryHDU().writeto(filename, output_verify='silentfix', clobber=True)
+        write_test_data(fits.PrimaryHDU(), filename)
 
 
 def build_test_data_zero():
@@ -81,7 +68,7 @@ def build_test_data_zero():
     """
     data = Array.zeros((32, 16), dtype='int32')
     for filename in ZEROS:
-        fits.PrimaryHDU(data=data).writeto(filename, output_verify='silentfix', clobber=True)
+        write_test_data(fits.PrimaryHDU(data=data), filename)
 
 
 def build_test_data_one():
@@ -91,16 +78,27 @@ def build_test_data_one():
     """
     data = Array.ones((32, 16), dtype='int32')
     for filename in ONES:
-        fits.PrimaryHDU(data=data).writeto(filename, output_verify='silentfix', clobber=True)
+        write_test_data(fits.PrimaryHDU(data=data), filename)
 
 
-def delete_test_data():
-    """
-       This function deletes fits files used in testing
-    """
-    for filename in FILENAMES:
-        if os.path.exists(filename):
-            os.remove(filename)
+def setUpModule():
+    global TEST_DIR
+    TEST_DIR = tempfile.mkdtemp(prefix='darma_bitmask_test_')
+    set_test_filenames()
+    # tearDownModule is not called if setUpModule fails, so clean up
+    # the test directory here in that case.
+    try:
+        build_test_data_empty()
+        build_test_data_zero()
+        build_test_data_one()
+    except:
+        tearDownModule()
+        raise
+
+
+def tearDownModule():
+    # Removing the test directory deletes the test data.
+    shutil.rmtree(TEST_DIR, ignore_errors=True)
 
 ########################################################################
 #                                                                      #
@@ -115,13 +113,6 @@ class bitmask_load_error_test(unittest.TestCase):
        Do bitmasks loaded from bogus sources raise errors?
     """
 
-    def setUp(self):
-        build_test_data_zero()
-        build_test_data_one()
-
-    def tearDown(self):
-        delete_test_data()
-
     def test_load_error(self):
         print(self.__class__.__name__)
         self.assertRaises(DARMAError, bitmask, filename='Unknown.fits')
@@ -135,12 +126,6 @@ class bitmask_load_empty_test(unittest.TestCase):
        Are bitmasks loaded without data empty?
     """
 
-    def setUp(self):
-        build_test_data_empty()
-
-    def tearDown(self):
-        delete_test_data()
-
     def test_load_empty(self):
         print(self.__class__.__name__)
         msk = bitmask()
@@ -4,70 +4,34 @@ Unit test for DARMA cube
 
 __version__ = '@(#)$Revision$'
 
-from ..common import DARMAError, unicode
+from ..common import DARMAError
 from ..cube import cube
 from .common_test import fits, Array
 
 import unittest
+import errno
 import os
-import collections
-
-SINGLE1 = 'SEF1.fits'
-SINGLE2 = 'SEF2.fits'
-#SINGLES = [SINGLE1, SINGLE2]
-SINGLES = [SINGLE1]
-MULTI1 = 'MEF1.fits'
-MULTI2 = 'MEF2.fits'
-#MULTIS = [MULTI1, MULTI2]
-MULTIS = [MULTI1]
-EMPTY1 = 'EMPTY1.fits'
-EMPTY2 = 'EMPTY2.fits'
-#EMPTYS = [EMPTY1, EMPTY2]
-EMPTYS = [EMPTY1]
-ZERO1 = 'ZERO1.fits'
-ZERO2 = 'ZERO2.fits'
-#ZEROS = [ZERO1, ZERO2]
-ZEROS = [ZERO1]
-ONE1 = 'ONE1.fits'
-ONE2 = 'ONE2.fits'
-#ONES = [ONE1, ONE2]
-ONES = [ONE1]
-FILENAMES = SINGLES + MULTIS + EMPTYS + ZEROS + ONES
-
-
-def build_test_data_sef():
-    """
-       This function builds SEF files to be used in testing
-    """
-    data = Array.asanyarray([
-        Array.random.normal(1.0, 0.5, (32, 16)).astype('float32'),
-        Array.random.normal(1.0, 0.5, (32, 16)).astype('float32'),
-        Array.random.normal(1.0, 0.5, (32, 16)).astype('float32'),
-    ])
-    for filename in SINGLES:
-        fits.PrimaryHDU(data=data).writeto(filename, output_verify='silentfix', clobber=True)
+import shutil
+import tempfile
 
+# The test data are built once per module in a directory created by
+# setUpModule(), in memory (tmpfs) where available, which then sets the
+# file names (set_test_filenames()).
+TEST_DIR = None
 
-def build_test_data_mef():
+
+def set_test_filenames():
     """
-       This function builds MEF files to be used in testing
+       This function sets the names of the files used in testing to
+       files in TEST_DIR
     """
-    data = Array.asanyarray([
-        Array.random.normal(1.0, 0.5, (32, 16)).astype('float32'),
-        Array.random.normal(1.0, 0.5, (32, 16)).astype('float32'),
-        Array.random.normal(1.0, 0.5, (32, 16)).astype('float32'),
-    ])
-    for filename in MULTIS:
-        hdu0 = fits.PrimaryHDU()
-        hdu1 = fits.ImageHDU(data=data)
-        update_header(hdu1.header, 'EXTNAME', 'EXT1')
-        hdu2 = fits.ImageHDU(data=data)
-        update_header(hdu2.header, 'EXTNAME', 'EXT2')
-        hdu3 = fits.ImageHDU(data=data)
-        update_header(hdu3.header, 'EXTNAME', 'EXT3')
-        hdus = fits.HDUList([hdu0, hdu1, hdu2, hdu3])
-        hdus.writeto(filename, output_verify='silentfix', clobber=True)
-        hdus.close()
+    global EMPTY1, EMPTY2, EMPTYS
+    global FILENAMES
+    EMPTY1 = os.path.join(TEST_DIR, 'EMPTY1.fits')
+    EMPTY2 = os.path.join(TEST_DIR, 'EMPTY2.fits')
+    #EMPTYS = [EMPTY1, EMPTY2]
+    EMPTYS = [EMPTY1]
+    FILENAMES = EMPTYS
 
 
 def build_test_data_empty():
@@ -78,41 +42,35 @@ def build_test_data_empty():
         fits.PrimaryHDU().writeto(filename, output_verify='silentfix', clobber=True)
 
 
-def build_test_data_zero():
-    """
-       This function builds SEF files with all zero data array to be
-       used in testing
-    """
-    data = Array.asanyarray([
-        Array.zeros((32, 16), dtype='int32'),
-        Array.zeros((32, 16), dtype='int32'),
-        Array.zeros((32, 16), dtype='int32'),
-    ])
-    for filename in ZEROS:
-        fits.PrimaryHDU(data=data).writeto(filename, output_verify='silentfix', clobber=True)
-
-
-def build_test_data_one():
-    """
-       This function builds SEF files with all one data array to be
-       used in testing
-    """
-    data = Array.asanyarray([
-        Array.ones((32, 16), dtype='int32'),
-        Array.ones((32, 16), dtype='int32'),
-        Array.ones((32, 16), dtype='int32'),
-    ])
-    for filename in ONES:
-        fits.PrimaryHDU(data=data).writeto(filename, output_verify='silentfix', clobber=True)
-
-
 def delete_test_data():
     """
        This function deletes fits files used in testing
     """
     for filename in FILENAMES:
-        if os.path.exists(filename):
+        try:
             os.remove(filename)
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
+
+
+def setUpModule():
+    global TEST_DIR
+    TEST_DIR = tempfile.mkdtemp(prefix='darma_cube_test_',
+                                dir='/dev/shm' if os.path.isdir('/dev/shm') else None)
+    set_test_filenames()
+    # tearDownModule is not called if setUpModule fails, so clean up
+    # the test directory here in that case.
+    try:
+        build_test_data_empty()
+    except:
+        tearDownModule()
+        raise
+
+
+def tearDownModule():
+    delete_test_data()
+    shutil.rmtree(TEST_DIR, ignore_errors=True)
 
 ########################################################################
 #                                                                      #
@@ -127,17 +85,10 @@ class cube_load_error_test(unittest.TestCase):
        Do cubes loaded from bogus sources raise errors?
     """
 
-    def setUp(self):
-        build_test_data_zero()
-        build_test_data_one()
-
-    def tearDown(self):
-        delete_test_data()
-
     def test_load_error(self):
         print(self.__class__.__name__)
         self.assertRaises(DARMAError, cube, filename='Unknown.fits')
-        cub = cube(filename=ZERO1, extension=1)
+        cub = cube(filename=EMPTY1, extension='UNKNOWN')
         self.assertRaises(DARMAError, cub.load)
 
 
@@ -147,12 +98,6 @@ class cube_load_empty_test(unittest.TestCase):
        Are cubes loaded without data empty?
     """
 
-    def setUp(self):
-        build_test_data_empty()
-
-    def tearDown(self):
-        delete_test_data()
-
     def test_load_empty(self):
         print(self.__class__.__name__)
         cub = cube()
@@ -160,5 +105,40 @@ class cube_load_empty_test(unittest.TestCase):
         cub = cube(filename=EMPTY1)
         self.assertIsNone(cub.data, msg='data array from dataless FITS not None')
 
+
+class cube_load_data_test(unittest.TestCase):
+
+    """
+       Are cubes loaded from data reshaped to 3 dimensions without
+       copying?
+    """
+
+    def test_load_data_2d(self):
+        print(self.__class__.__name__)
+        data = Array.zeros((32, 16), dtype='float32')
+        cub = cube(data=data)
+        self.assertEqual(cub.data.shape, (1, 32, 16), msg='2-dim data not reshaped to one plane')
+        self.assertTrue(Array.may_share_memory(cub.data, data), msg='2-dim data copied')
+
+    def test_load_data_3d(self):
+        print(self.__class__.__name__)
+        data = Array.zeros((3, 32, 16), dtype='float32')
+        cub = cube(data=data)
+        self.assertIs(cub.data, data, msg='3-dim data not used as is')
+
+    def test_load_data_4d(self):
+        print(self.__class__.__name__)
+        data = Array.arange(2 * 3 * 4 * 5, dtype='float32').reshape(2, 3, 4, 5)
+        for index in range(2):
+            cub = cube(data=data, index=index)
+            self.assertEqual(cub.data.shape, (3, 4, 5), msg='4-dim data not reduced to one cube')
+            self.assertTrue((cub.data == data[index]).all(), msg='wrong cube %d taken from 4-dim data' % index)
+            self.assertTrue(Array.may_share_memory(cub.data, data), msg='4-dim data copied')
+
+    def test_load_data_5d(self):
+        print(self.__class__.__name__)
+        data = Array.zeros((1, 1, 3, 4, 5), dtype='float32')
+        self.assertRaises(DARMAError, cube, data=data)
+
 if __name__ == '__main__':
     unittest.main()
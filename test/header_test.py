@@ -7,11 +7,21 @@ __version__ = '@(#)$Revision$'
 from ..common import DARMAError, unicode
 from ..header import header, getval, get_headers, get_keyword
 from ..header import update_header_in_file
+from ..header import _attribute_name, _ATTRIBUTE_NAMES, _MAX_ATTRIBUTE_NAMES
 from .common_test import fits, Array
 
 import unittest
+import errno
+import io
 import os
 import collections
+import shutil
+import tempfile
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+    # Python 2 without the futures backport
+    ThreadPoolExecutor = None
 
 # AstroPy/PyFITS compatibility
 try:
@@ -31,23 +41,11 @@ except:
         get_cardimage = lambda card: card.image
         update_header = lambda hdr, keyword, value: hdr.update([(keyword, value)])
 
-SINGLE1 = 'SEF1.fits'
-SINGLE2 = 'SEF2.fits'
-#SINGLES = [SINGLE1, SINGLE2]
-SINGLES = [SINGLE1]
-MULTI1 = 'MEF1.fits'
-MULTI2 = 'MEF2.fits'
-#MULTIS = [MULTI1, MULTI2]
-MULTIS = [MULTI1]
-ASCII1 = 'ASCII1.fits'
-ASCII2 = 'ASCII2.fits'
-#ASCIIS = [ASCII1, ASCII2]
-ASCIIS = [ASCII1]
-RAW1 = 'RAW1.fits'
-RAW2 = 'RAW2.fits'
-#RAWS = [RAW1, RAW2]
-RAWS = [RAW1]
-FILENAMES = SINGLES + MULTIS + ASCIIS + RAWS
+# The test data are built once per module in a directory created by
+# setUpModule(), in memory (tmpfs) where available, which then sets the
+# file names (set_test_filenames()).
+TEST_DIR = None
+
 PRIMARY = [
     '''SIMPLE  =                    T / conforms to FITS standard                      ''',
     '''BITPIX  =                    8 / array data type                                ''',
@@ -106,54 +104,176 @@ HISTORYCARDS = [
     '''HISTORY KEYWORD6=                  6.0 / DARMA Comment Card 6                   ''',
 ]
 STRINGS = PRIMARY + TYPES + HIERARCH + CONTINUE + BLANK + COMMENT + COMMENTCARDS + HISTORY + HISTORYCARDS
+# Numbers of COMMENT and HISTORY cards (including the keyword-like ones)
+NUM_COMMENTS = len(COMMENT) + len(COMMENTCARDS)
+NUM_HISTORIES = len(HISTORY) + len(HISTORYCARDS)
+# unicode (on Python 2) versions of STRINGS
+UNICODE_STRINGS = [u'%s' % string for string in STRINGS]
 CARDS = [fits.Card().fromstring(string) for string in STRINGS]
+# KEYWORDn and HIERARCH Keyword n values before and after the rename
+# tests rename keywords 1 and 2 to 3 and 4 (see check_renamed_keywords())
+RENAMED_BEFORE = [(1, 'one', 1.0), (2, 2, 'two'), (3, None, None), (4, None, None)]
+RENAMED_AFTER = [(1, None, None), (2, None, None), (3, 'one', 1.0), (4, 2, 'two')]
+# Types of strings returned by the header
+STRING_TYPES = (str, unicode)
+# Data of the SEF and MEF files (only their headers are tested)
+DATA = Array.zeros((32, 32), dtype='float32')
+# Headers built by cards_header() and default_header()
+_CARDS_HEADER = None
+_DEFAULT_HEADER = None
+
+
+def set_test_filenames():
+    """
+       This function sets the names of the files used in testing to
+       files in TEST_DIR
+    """
+    global SINGLE1, SINGLE2, SINGLES
+    global MULTI1, MULTI2, MULTIS
+    global ASCII1, ASCII2, ASCIIS
+    global RAW1, RAW2, RAWS
+    global FILENAMES
+    SINGLE1 = os.path.join(TEST_DIR, 'SEF1.fits')
+    SINGLE2 = os.path.join(TEST_DIR, 'SEF2.fits')
+    #SINGLES = [SINGLE1, SINGLE2]
+    SINGLES = [SINGLE1]
+    MULTI1 = os.path.join(TEST_DIR, 'MEF1.fits')
+    MULTI2 = os.path.join(TEST_DIR, 'MEF2.fits')
+    #MULTIS = [MULTI1, MULTI2]
+    MULTIS = [MULTI1]
+    ASCII1 = os.path.join(TEST_DIR, 'ASCII1.fits')
+    ASCII2 = os.path.join(TEST_DIR, 'ASCII2.fits')
+    #ASCIIS = [ASCII1, ASCII2]
+    ASCIIS = [ASCII1]
+    RAW1 = os.path.join(TEST_DIR, 'RAW1.fits')
+    RAW2 = os.path.join(TEST_DIR, 'RAW2.fits')
+    #RAWS = [RAW1, RAW2]
+    RAWS = [RAW1]
+    FILENAMES = SINGLES + MULTIS + ASCIIS + RAWS
+
+
+def write_test_data(hdus, filename):
+    """
+       This function writes an HDU or HDUList to filename, overwriting
+       an existing file
+    """
+    try:
+        hdus.writeto(filename, output_verify='ignore', overwrite=True)
+    except TypeError:
+        # PyFITS and old Astropy versions only know clobber
+        hdus.writeto(filename, output_verify='ignore', clobber=True)
 
 
 def build_test_data_sef():
     """
        This function builds SEF files to be used in testing
     """
-    data = Array.random.normal(1.0, 0.5, (32, 32)).astype('float32')
+    data = DATA
     for filename in SINGLES:
-        fits.PrimaryHDU(data=data).writeto(filename, output_verify='silentfix', clobber=True)
+        write_test_data(fits.PrimaryHDU(data=data), filename)
 
 
 def build_test_data_mef():
     """
        This function builds MEF files to be used in testing
     """
-    data = Array.random.normal(1.0, 0.5, (32, 32)).astype('float32')
+    data = DATA
     for filename in MULTIS:
-        hdu0 = fits.PrimaryHDU()
-        hdu1 = fits.ImageHDU(data=data)
-        update_header(hdu1.header, 'EXTNAME', 'EXT1')
-        hdu2 = fits.ImageHDU(data=data)
-        update_header(hdu2.header, 'EXTNAME', 'EXT2')
-        hdu3 = fits.ImageHDU(data=data)
-        update_header(hdu3.header, 'EXTNAME', 'EXT3')
-        hdus = fits.HDUList([hdu0, hdu1, hdu2, hdu3])
-        hdus.writeto(filename, output_verify='silentfix', clobber=True)
-        hdus.close()
+        hdus = fits.HDUList([fits.PrimaryHDU()])
+        for extname in ['EXT1', 'EXT2', 'EXT3']:
+            hdu = fits.ImageHDU(data=data)
+            update_header(hdu.header, 'EXTNAME', extname)
+            hdus.append(hdu)
+        write_test_data(hdus, filename)
 
 
 def build_test_data_raw():
     """
        This function builds RAW header files to be used in testing
     """
+    buf = io.BytesIO()
+    write_test_data(fits.PrimaryHDU(), buf)
+    contents = buf.getvalue()
     for filename in RAWS:
-        fits.PrimaryHDU().writeto(filename, output_verify='silentfix', clobber=True)
+        with open(filename, 'wb') as fd:
+            fd.write(contents)
 
 
 def build_test_data_ascii():
     """
        This function builds ASCII header files to be used in testing
     """
+    cards = [get_cardimage(card) for card in get_cardlist(fits.PrimaryHDU().header)]
+    cards.append('END%s' % (' ' * 77))
+    contents = '\n'.join(cards) + '\n'
     for filename in ASCIIS:
-        hdu = fits.PrimaryHDU()
         with open(filename, 'w') as fd:
-            lines = ['%s\n' % get_cardimage(card) for card in get_cardlist(hdu.header)]
-            lines.append('END%s\n' % (' ' * 77))
-            fd.writelines(lines)
+            fd.write(contents)
+
+
+def cards_header():
+    """
+       This function returns the header built from CARDS, building it on
+       first use.  The header is shared by the tests that only read it, so
+       it must not be modified (tests that modify their header build their
+       own).
+    """
+    global _CARDS_HEADER
+    if _CARDS_HEADER is None:
+        _CARDS_HEADER = header(cardlist=CARDS)
+    return _CARDS_HEADER
+
+
+def default_header():
+    """
+       This function returns the default primary header, building it on
+       first use.  Like cards_header(), the header is shared and must not
+       be modified.
+    """
+    global _DEFAULT_HEADER
+    if _DEFAULT_HEADER is None:
+        _DEFAULT_HEADER = header().default()
+    return _DEFAULT_HEADER
+
+
+def count_items(iterator):
+    """
+       This function returns the number of items in an iterator without
+       building a list of them
+    """
+    count = 0
+    for _ in iterator:
+        count += 1
+    return count
+
+
+def check_renamed_keywords(test, hdr, expected):
+    """
+       This function checks the KEYWORDn and HIERARCH Keyword n values and
+       attributes of a header in the rename tests against a list of
+       (n, KEYWORDn value, HIERARCH Keyword n value) tuples, where a value
+       of None means the keyword is missing
+    """
+    for num, value, hierarch_value in expected:
+        for keyword, attribute, val in [('KEYWORD%d' % num, 'KEYWORD%d' % num, value),
+                                        ('HIERARCH Keyword %d' % num, 'HIERARCH_Keyword_%d' % num,
+                                         hierarch_value)]:
+            test.assertEqual(hdr[keyword], val, msg='%s value has wrong value' % keyword)
+            if val is None:
+                test.assertRaises(AttributeError, getattr, hdr, attribute)
+            else:
+                test.assertEqual(getattr(hdr, attribute).value, val, msg='%s attribute has wrong value' % keyword)
+
+
+def remove_test_file(filename):
+    """
+       This function deletes a file used in testing if it exists
+    """
+    try:
+        os.remove(filename)
+    except OSError as e:
+        if e.errno != errno.ENOENT:
+            raise
 
 
 def delete_test_data():
@@ -161,8 +281,36 @@ def delete_test_data():
        This function deletes fits files used in testing
     """
     for filename in FILENAMES:
-        if os.path.exists(filename):
-            os.remove(filename)
+        remove_test_file(filename)
+
+
+def setUpModule():
+    global TEST_DIR
+    TEST_DIR = tempfile.mkdtemp(prefix='darma_header_test_',
+                                dir='/dev/shm' if os.path.isdir('/dev/shm') else None)
+    set_test_filenames()
+    # The test data are only read, so they are built once.  The builders
+    # write disjoint files, so they can run concurrently.
+    builders = [build_test_data_sef, build_test_data_mef,
+                build_test_data_raw, build_test_data_ascii]
+    # tearDownModule is not called if setUpModule fails, so clean up
+    # the test directory here in that case.
+    try:
+        if ThreadPoolExecutor is None:
+            for builder in builders:
+                builder()
+        else:
+            with ThreadPoolExecutor(max_workers=len(builders)) as executor:
+                # list() re-raises any exception from a builder.
+                list(executor.map(lambda builder: builder(), builders))
+    except:
+        tearDownModule()
+        raise
+
+
+def tearDownModule():
+    delete_test_data()
+    shutil.rmtree(TEST_DIR, ignore_errors=True)
 
 ########################################################################
 #
@@ -204,12 +352,6 @@ class header_load_error_test(unittest.TestCase):
        Do headers loaded from bogus sources raise errors?
     """
 
-    def setUp(self):
-        build_test_data_sef()
-
-    def tearDown(self):
-        delete_test_data()
-
     def test_load_error(self):
         print(self.__class__.__name__)
         self.assertRaises(DARMAError, header, filename='Unknown.fits')
@@ -260,12 +402,6 @@ class header_load_filename_test(unittest.TestCase):
        Are headers able to be loaded properly from SEFs?
     """
 
-    def setUp(self):
-        build_test_data_sef()
-
-    def tearDown(self):
-        delete_test_data()
-
     def test_load_filename(self):
         print(self.__class__.__name__)
         self.assertIsInstance(header(filename=SINGLE1), header, msg='not a header instance')
@@ -277,12 +413,6 @@ class header_load_filename_extensions_test(unittest.TestCase):
        Are headers able to be loaded properly from MEFs?
     """
 
-    def setUp(self):
-        build_test_data_mef()
-
-    def tearDown(self):
-        delete_test_data()
-
     def test_load_filename_extensions(self):
         print(self.__class__.__name__)
         hdr0 = header(filename=MULTI1, extension=0)
@@ -332,7 +462,7 @@ class header_load_cardlist_unicode_test(unittest.TestCase):
 
     def test_load_cardlist_unicode(self):
         print(self.__class__.__name__)
-        hdr = header(cardlist=[u'%s' % string for string in STRINGS])
+        hdr = header(cardlist=UNICODE_STRINGS)
         self.assertIsInstance(hdr, header, msg='unicode header not a header instance')
         self.assertEqual(len(hdr), len(STRINGS), msg='unicode header is wrong length')
 
@@ -362,13 +492,6 @@ class header_load_cardlist_file_test(unittest.TestCase):
        Are headers able to be loaded from ASCII files?
     """
 
-    def setUp(self):
-        build_test_data_raw()
-        build_test_data_ascii()
-
-    def tearDown(self):
-        delete_test_data()
-
     def test_load_cardlist_file(self):
         print(self.__class__.__name__)
         hdr = header(cardlist=ASCII1)
@@ -386,12 +509,9 @@ class header_load_all_headers_test(unittest.TestCase):
     """
 
     def setUp(self):
-        build_test_data_sef()
-        build_test_data_mef()
         self.pri = header().default()
 
     def tearDown(self):
-        delete_test_data()
         del self.pri
 
     def test_load_all_headers(self):
@@ -509,13 +629,11 @@ class header_save_raw_test(unittest.TestCase):
 
     def setUp(self):
         self.pri = header().default()
-        self.filename = 'raw.fits'
+        self.filename = os.path.join(TEST_DIR, 'raw.fits')
 
     def tearDown(self):
         del self.pri
-        filename = self.filename
-        if os.path.exists(filename):
-            os.remove(filename)
+        remove_test_file(self.filename)
 
     def test_save_raw(self):
         print(self.__class__.__name__)
@@ -538,13 +656,11 @@ class header_save_ascii_test(unittest.TestCase):
 
     def setUp(self):
         self.pri = header().default()
-        self.filename = 'ascii.head'
+        self.filename = os.path.join(TEST_DIR, 'ascii.head')
 
     def tearDown(self):
         del self.pri
-        filename = self.filename
-        if os.path.exists(filename):
-            os.remove(filename)
+        remove_test_file(self.filename)
 
     def test_save_ascii(self):
         print(self.__class__.__name__)
@@ -567,13 +683,11 @@ class header_save_clobber_test(unittest.TestCase):
 
     def setUp(self):
         self.pri = header().default()
-        self.filename = 'clobber.fits'
+        self.filename = os.path.join(TEST_DIR, 'clobber.fits')
 
     def tearDown(self):
         del self.pri
-        filename = self.filename
-        if os.path.exists(filename):
-            os.remove(filename)
+        remove_test_file(self.filename)
 
     def test_save_clobber(self):
         print(self.__class__.__name__)
@@ -597,13 +711,11 @@ class header_save_append_test(unittest.TestCase):
 
     def setUp(self):
         self.pri = header().default()
-        self.filename = 'append.fits'
+        self.filename = os.path.join(TEST_DIR, 'append.fits')
 
     def tearDown(self):
         del self.pri
-        filename = self.filename
-        if os.path.exists(filename):
-            os.remove(filename)
+        remove_test_file(self.filename)
 
     def test_save_append(self):
         print(self.__class__.__name__)
@@ -627,6 +739,33 @@ class header_save_append_test(unittest.TestCase):
         self.assertEqual(contents.count(b'SIMPLE'), 2, msg='raw file does not contain 2 SIMPLE cards')
 
 
+class header_save_file_object_test(unittest.TestCase):
+
+    """
+       Are headers able to be saved to file objects?
+    """
+
+    def setUp(self):
+        self.pri = header().default()
+
+    def tearDown(self):
+        del self.pri
+
+    def test_save_file_object(self):
+        print(self.__class__.__name__)
+        pri = self.pri
+        buf = io.BytesIO()
+        pri.save(buf, raw=True)
+        size1 = len(buf.getvalue())
+        self.assertTrue(size1 % 2880 == 0, msg='size of raw buffer is not a multiple of 2880')
+        pri.save(buf, raw=True)
+        contents = buf.getvalue()
+        self.assertEqual(len(contents), 2 * size1, msg='final size of raw buffer not twice the initial size')
+        self.assertEqual(contents[:6], b'SIMPLE', msg='raw buffer does not start with SIMPLE')
+        self.assertEqual(contents.count(b'SIMPLE'), 2, msg='raw buffer does not contain 2 SIMPLE cards')
+        self.assertIsNone(pri.filename, msg='file object set as header filename')
+
+
 class header_save_dataless_test(unittest.TestCase):
 
     """
@@ -634,16 +773,12 @@ class header_save_dataless_test(unittest.TestCase):
     """
 
     def setUp(self):
-        build_test_data_sef()
         self.sef = header(filename=SINGLE1)
-        self.filename = 'dataless.fits'
+        self.filename = os.path.join(TEST_DIR, 'dataless.fits')
 
     def tearDown(self):
-        delete_test_data()
         del self.sef
-        filename = self.filename
-        if os.path.exists(filename):
-            os.remove(filename)
+        remove_test_file(self.filename)
 
     def test_save_dataless(self):
         print(self.__class__.__name__)
@@ -756,8 +891,7 @@ class header_creation_copy_test(unittest.TestCase):
         hdr = self.hdr
         copy = hdr.copy()
         self.assertIsInstance(copy, header, msg='not a header instance')
-        for keyword in hdr:
-            self.assertEqual(copy[keyword], hdr[keyword], msg='%s keywords not copied properly' % keyword)
+        self.assertEqual(copy.items(), hdr.items(), msg='keywords not copied properly')
 
 ########################################################################
 #
@@ -819,10 +953,7 @@ class header_read_fits_keywords_dict_test(unittest.TestCase):
     """
 
     def setUp(self):
-        self.crd = header(cardlist=CARDS)
-
-    def tearDown(self):
-        del self.crd
+        self.crd = cards_header()
 
     def test_read_fits_keywords_dict(self):
         print(self.__class__.__name__)
@@ -844,10 +975,7 @@ class header_read_fits_indexes_dict_test(unittest.TestCase):
     """
 
     def setUp(self):
-        self.crd = header(cardlist=CARDS)
-
-    def tearDown(self):
-        del self.crd
+        self.crd = cards_header()
 
     def test_read_fits_indexes_dict(self):
         print(self.__class__.__name__)
@@ -870,10 +998,7 @@ class header_read_fits_keywords_attr_test(unittest.TestCase):
     """
 
     def setUp(self):
-        self.crd = header(cardlist=CARDS)
-
-    def tearDown(self):
-        del self.crd
+        self.crd = cards_header()
 
     def test_read_fits_keywords_attr(self):
         print(self.__class__.__name__)
@@ -896,26 +1021,16 @@ class header_read_hierarch_keywords_dict_test(unittest.TestCase):
     """
 
     def setUp(self):
-        self.crd = header(cardlist=CARDS)
-
-    def tearDown(self):
-        del self.crd
+        self.crd = cards_header()
 
     def test_read_hierarch_keywords_dict(self):
         print(self.__class__.__name__)
         crd = self.crd
-        val = crd['DARMA Hierarch Card 1']
-        self.assertEqual(val, 'one', msg='wrong value for HIERARCH Card 1')
-        val = crd['DARMA Hierarch Card 2']
-        self.assertEqual(val, 2, msg='wrong value for HIERARCH Card 2')
-        val = crd['DARMA Hierarch Card 3']
-        self.assertEqual(val, 3.0, msg='wrong value for HIERARCH Card 3')
-        val = crd['HIERARCH DARMA Hierarch Card 1']
-        self.assertEqual(val, 'one', msg='wrong value for HIERARCH Card 1')
-        val = crd['HIERARCH DARMA Hierarch Card 2']
-        self.assertEqual(val, 2, msg='wrong value for HIERARCH Card 2')
-        val = crd['HIERARCH DARMA Hierarch Card 3']
-        self.assertEqual(val, 3.0, msg='wrong value for HIERARCH Card 3')
+        # with and without the HIERARCH prefix
+        for prefix in ('', 'HIERARCH '):
+            for num, value in ((1, 'one'), (2, 2), (3, 3.0)):
+                val = crd['%sDARMA Hierarch Card %d' % (prefix, num)]
+                self.assertEqual(val, value, msg='wrong value for HIERARCH Card %d' % num)
 
 
 class header_read_hierarch_keywords_attr_test(unittest.TestCase):
@@ -925,10 +1040,7 @@ class header_read_hierarch_keywords_attr_test(unittest.TestCase):
     """
 
     def setUp(self):
-        self.crd = header(cardlist=CARDS)
-
-    def tearDown(self):
-        del self.crd
+        self.crd = cards_header()
 
     def test_read_hierarch_keywords_attr(self):
         print(self.__class__.__name__)
@@ -951,11 +1063,8 @@ class header_read_blanks_test(unittest.TestCase):
     """
 
     def setUp(self):
-        self.crd = header(cardlist=CARDS)
-        self.pri = header().default()
-
-    def tearDown(self):
-        del self.crd, self.pri
+        self.crd = cards_header()
+        self.pri = default_header()
 
     def test_read_blanks(self):
         print(self.__class__.__name__)
@@ -964,8 +1073,7 @@ class header_read_blanks_test(unittest.TestCase):
         pri = self.pri
         blanks = crd.get_blank()
         self.assertEqual(len(blanks), len(BLANK), msg='wrong number of blanks')
-        for blank in blanks:
-            self.assertIsInstance(blank, (str, unicode), msg='wrong blank card type')
+        self.assertTrue(all(isinstance(blank, STRING_TYPES) for blank in blanks), msg='wrong blank card type')
         blanks = pri.get_blank()
         self.assertEqual(len(blanks), 0, msg='number of blanks not zero')
 
@@ -976,15 +1084,7 @@ class header_read_blank_cards_test(unittest.TestCase):
        Are all BLANKs in the header read correctly?
     """
 
-    def setUp(self):
-        pass
-        #self.crd = header(cardlist=CARDS)
-        #self.pri = header().default()
-
-    def tearDown(self):
-        pass
-        #del self.crd, self.pri
-
+    @unittest.skip('not yet testable')
     def test_read_blank_cards(self):
         print(self.__class__.__name__)
         '''get all blank cards'''
@@ -1009,11 +1109,8 @@ class header_read_comments_test(unittest.TestCase):
     """
 
     def setUp(self):
-        self.crd = header(cardlist=CARDS)
-        self.pri = header().default()
-
-    def tearDown(self):
-        del self.crd, self.pri
+        self.crd = cards_header()
+        self.pri = default_header()
 
     def test_read_comments(self):
         print(self.__class__.__name__)
@@ -1021,9 +1118,8 @@ class header_read_comments_test(unittest.TestCase):
         crd = self.crd
         pri = self.pri
         comments = crd.get_comment()
-        self.assertEqual(len(comments), len(COMMENT + COMMENTCARDS), msg='wrong number of comments')
-        for comment in comments:
-            self.assertIsInstance(comment, (str, unicode), msg='wrong comment card type')
+        self.assertEqual(len(comments), NUM_COMMENTS, msg='wrong number of comments')
+        self.assertTrue(all(isinstance(comment, STRING_TYPES) for comment in comments), msg='wrong comment card type')
         comments = pri.get_comment()
         self.assertEqual(len(comments), 0, msg='number of comments not zero')
 
@@ -1035,11 +1131,8 @@ class header_read_comment_cards_test(unittest.TestCase):
     """
 
     def setUp(self):
-        self.crd = header(cardlist=CARDS)
-        self.pri = header().default()
-
-    def tearDown(self):
-        del self.crd, self.pri
+        self.crd = cards_header()
+        self.pri = default_header()
 
     def test_read_comment_cards(self):
         print(self.__class__.__name__)
@@ -1048,8 +1141,7 @@ class header_read_comment_cards_test(unittest.TestCase):
         pri = self.pri
         cards = crd.get_comment_cards()
         self.assertEqual(len(cards), len(COMMENTCARDS), msg='wrong number of comment cards')
-        for card in cards:
-            self.assertIsInstance(card, fits.Card, msg='wrong comment card type')
+        self.assertTrue(all(isinstance(card, fits.Card) for card in cards), msg='wrong comment card type')
         cards = pri.get_comment_cards()
         self.assertEqual(len(cards), 0, msg='number of comment cards not zero')
 
@@ -1061,20 +1153,16 @@ class header_read_history_test(unittest.TestCase):
     """
 
     def setUp(self):
-        self.crd = header(cardlist=CARDS)
-        self.pri = header().default()
-
-    def tearDown(self):
-        del self.crd, self.pri
+        self.crd = cards_header()
+        self.pri = default_header()
 
     def test_read_history(self):
         print(self.__class__.__name__)
         crd = self.crd
         pri = self.pri
         historys = crd.get_history()
-        self.assertEqual(len(historys), len(HISTORY + HISTORYCARDS), msg='wrong number of histories')
-        for history in historys:
-            self.assertIsInstance(history, (str, unicode), msg='wrong history card type')
+        self.assertEqual(len(historys), NUM_HISTORIES, msg='wrong number of histories')
+        self.assertTrue(all(isinstance(history, STRING_TYPES) for history in historys), msg='wrong history card type')
         historys = pri.get_history()
         self.assertEqual(len(historys), 0, msg='number of histories not zero')
 
@@ -1086,11 +1174,8 @@ class header_read_history_cards_test(unittest.TestCase):
     """
 
     def setUp(self):
-        self.crd = header(cardlist=CARDS)
-        self.pri = header().default()
-
-    def tearDown(self):
-        del self.crd, self.pri
+        self.crd = cards_header()
+        self.pri = default_header()
 
     def test_read_history_cards(self):
         print(self.__class__.__name__)
@@ -1098,8 +1183,7 @@ class header_read_history_cards_test(unittest.TestCase):
         pri = self.pri
         cards = crd.get_history_cards()
         self.assertEqual(len(cards), len(HISTORYCARDS), msg='wrong numner of history cards')
-        for card in cards:
-            self.assertIsInstance(card, fits.Card, msg='wrong comment card type')
+        self.assertTrue(all(isinstance(card, fits.Card) for card in cards), msg='wrong comment card type')
         cards = pri.get_history_cards()
         self.assertEqual(len(cards), 0, msg='number of history cards not zero')
 
@@ -1111,10 +1195,7 @@ class header_read_info_test(unittest.TestCase):
     """
 
     def setUp(self):
-        self.pri = header().default()
-
-    def tearDown(self):
-        del self.pri
+        self.pri = default_header()
 
     def test_read_info(self):
         print(self.__class__.__name__)
@@ -1129,10 +1210,7 @@ class header_read_dump_test(unittest.TestCase):
     """
 
     def setUp(self):
-        self.pri = header().default()
-
-    def tearDown(self):
-        del self.pri
+        self.pri = default_header()
 
     def test_read_dump(self):
         print(self.__class__.__name__)
@@ -1147,10 +1225,7 @@ class header_read_comment_test(unittest.TestCase):
     """
 
     def setUp(self):
-        self.pri = header().default()
-
-    def tearDown(self):
-        del self.pri
+        self.pri = default_header()
 
     def test_read_comment(self):
         print(self.__class__.__name__)
@@ -1172,12 +1247,7 @@ class header_read_value_test(unittest.TestCase):
        Are keyword values in the header read correctly?
     """
 
-    def setUp(self):
-        pass
-
-    def tearDown(self):
-        pass
-
+    @unittest.skip('tested in the other header read tests')
     def test_read_value(self):
         print(self.__class__.__name__)
         '''get value from a card, tested previously in many other tests'''
@@ -1191,11 +1261,8 @@ class header_read_length_test(unittest.TestCase):
     """
 
     def setUp(self):
-        self.pri = header().default()
-        self.crd = header(cardlist=CARDS)
-
-    def tearDown(self):
-        del self.pri, self.crd
+        self.pri = default_header()
+        self.crd = cards_header()
 
     def test_read_length(self):
         print(self.__class__.__name__)
@@ -1212,19 +1279,13 @@ class header_read_contents_test(unittest.TestCase):
     """
 
     def setUp(self):
-        self.crd = header(cardlist=CARDS)
-
-    def tearDown(self):
-        del self.crd
+        self.crd = cards_header()
 
     def test_read_contents(self):
         print(self.__class__.__name__)
         crd = self.crd
-        self.assertTrue('SIMPLE' in crd, msg='SIMPLE card not found in default header')
-        self.assertTrue('HIERARCH DARMA Hierarch Card 1' in crd, msg='HIERARCH card not found in default header')
-        self.assertTrue('DARMA Hierarch Card 1' in crd, msg='HIERARCH card not found in default header')
-        self.assertTrue('COMMENT' in crd, msg='COMMENT card not found in default header')
-        self.assertTrue('HISTORY' in crd, msg='HISTORY card not found in default header')
+        for keyword in ['SIMPLE', 'HIERARCH DARMA Hierarch Card 1', 'DARMA Hierarch Card 1', 'COMMENT', 'HISTORY']:
+            self.assertIn(keyword, crd, msg='%s card not found in default header' % keyword)
 
 
 class header_read_representation_test(unittest.TestCase):
@@ -1237,9 +1298,6 @@ class header_read_representation_test(unittest.TestCase):
         self.pri = header().default()
         self.crd = header(cardlist=CARDS)
 
-    def tearDown(self):
-        del self.pri, self.crd
-
     def test_read_representation(self):
         print(self.__class__.__name__)
         pri = self.pri
@@ -1249,10 +1307,10 @@ class header_read_representation_test(unittest.TestCase):
         del pri.hdr, crd.hdr
         _prepr = repr(pri)
         _crepr = repr(crd)
-        self.assertIsInstance(prepr, (str, unicode), msg='representation is not a string')
-        self.assertIsInstance(crepr, (str, unicode), msg='representation is not a string')
-        self.assertIsInstance(_prepr, (str, unicode), msg='representation is not a string')
-        self.assertIsInstance(_crepr, (str, unicode), msg='representation is not a string')
+        self.assertIsInstance(prepr, STRING_TYPES, msg='representation is not a string')
+        self.assertIsInstance(crepr, STRING_TYPES, msg='representation is not a string')
+        self.assertIsInstance(_prepr, STRING_TYPES, msg='representation is not a string')
+        self.assertIsInstance(_crepr, STRING_TYPES, msg='representation is not a string')
         self.assertLess(_prepr, prepr, msg='empty representation is not less than non-empty representation')
         self.assertLess(_crepr, crepr, msg='empty representation is not less than non-empty representation')
         self.assertEqual(_prepr, _crepr, msg='empty representations are not equal')
@@ -1267,17 +1325,14 @@ class header_read_string_test(unittest.TestCase):
     def setUp(self):
         self.pri = header().default()
 
-    def tearDown(self):
-        del self.pri
-
     def test_read_string(self):
         print(self.__class__.__name__)
         '''__str__'''
         pri = self.pri
-        self.assertIsInstance(str(pri), (str, unicode), msg='result of string casting is not a string')
+        self.assertIsInstance(str(pri), STRING_TYPES, msg='result of string casting is not a string')
         self.assertGreater(len(str(pri)), 0, msg='result of string casting is not a string')
         del pri.hdr
-        self.assertIsInstance(str(pri), (str, unicode), msg='result of string casting is not a string')
+        self.assertIsInstance(str(pri), STRING_TYPES, msg='result of string casting is not a string')
         self.assertEqual(str(pri), '', msg='result of string casting is not a string')
 
 
@@ -1288,10 +1343,7 @@ class header_read_keywords_test(unittest.TestCase):
     """
 
     def setUp(self):
-        self.pri = header().default()
-
-    def tearDown(self):
-        del self.pri
+        self.pri = default_header()
 
     def test_read_keywords(self):
         print(self.__class__.__name__)
@@ -1311,10 +1363,7 @@ class header_read_values_test(unittest.TestCase):
     """
 
     def setUp(self):
-        self.pri = header().default()
-
-    def tearDown(self):
-        del self.pri
+        self.pri = default_header()
 
     def test_read_values(self):
         print(self.__class__.__name__)
@@ -1331,10 +1380,7 @@ class header_read_comment_values_test(unittest.TestCase):
     """
 
     def setUp(self):
-        self.pri = header().default()
-
-    def tearDown(self):
-        del self.pri
+        self.pri = default_header()
 
     def test_read_comment_values(self):
         print(self.__class__.__name__)
@@ -1352,22 +1398,20 @@ class header_read_items_test(unittest.TestCase):
     """
 
     def setUp(self):
-        self.pri = header().default()
-
-    def tearDown(self):
-        del self.pri
+        self.pri = default_header()
 
     def test_read_items(self):
         print(self.__class__.__name__)
         pri = self.pri
+        length = len(pri)
         items = pri.items()
         self.assertIsInstance(items, list, msg='result of items() not a list')
-        self.assertEqual(len(items), len(pri), msg='items list is wrong length')
+        self.assertEqual(len(items), length, msg='items list is wrong length')
         for item in items:
             self.assertEqual(len(item), 3, msg='item tuple is wrong length')
         items = pri.items(comments=False)
         self.assertIsInstance(items, list, msg='result of items() not a list')
-        self.assertEqual(len(items), len(pri), msg='items list is wrong length')
+        self.assertEqual(len(items), length, msg='items list is wrong length')
         for item in items:
             self.assertEqual(len(item), 2, msg='item tuple is wrong length')
 
@@ -1379,10 +1423,7 @@ class header_read_cards_test(unittest.TestCase):
     """
 
     def setUp(self):
-        self.pri = header().default()
-
-    def tearDown(self):
-        del self.pri
+        self.pri = default_header()
 
     def test_read_cards(self):
         print(self.__class__.__name__)
@@ -1402,51 +1443,53 @@ class header_read_iterators_test(unittest.TestCase):
     def setUp(self):
         self.pri = header().default()
 
-    def tearDown(self):
-        del self.pri
-
     def test_read_iterators(self):
         print(self.__class__.__name__)
         pri = self.pri
+        length = len(pri)
         # iterkeywords
         iterkeywords = pri.iterkeywords()
         self.assertIsInstance(iterkeywords, collections.Iterator, msg='result of iterkeywords() not an iterator')
-        self.assertEqual(len(list(iterkeywords)), len(pri), msg='iterkeywords iterator is wrong length')
+        self.assertEqual(count_items(iterkeywords), length, msg='iterkeywords iterator is wrong length')
         # iterkeys
         iterkeys = pri.iterkeys()
         self.assertIsInstance(iterkeys, collections.Iterator, msg='result of iterkeys() not an iterator')
-        self.assertEqual(len(list(iterkeys)), len(pri), msg='keys iterator is wrong length')
+        self.assertEqual(count_items(iterkeys), length, msg='keys iterator is wrong length')
         # itervalues
         itervalues = pri.itervalues()
         self.assertIsInstance(itervalues, collections.Iterator, msg='result of itervalues() not an iterator')
-        self.assertEqual(len(list(itervalues)), len(pri), msg='keys iterator is wrong length')
+        self.assertEqual(count_items(itervalues), length, msg='keys iterator is wrong length')
         # itercomments
         itercomments = pri.itercomments()
         self.assertIsInstance(itercomments, collections.Iterator, msg='result of itercomments() not an iterator')
-        self.assertEqual(len(list(itercomments)), len(pri), msg='itercomments list is wrong length')
+        self.assertEqual(count_items(itercomments), length, msg='itercomments list is wrong length')
         # iteritems
         iteritems = pri.iteritems()
         self.assertIsInstance(iteritems, collections.Iterator, msg='result of iteritems() not an iterator')
-        self.assertEqual(len(list(iteritems)), len(pri), msg='iteritems iterator is wrong length')
+        count = 0
         for iteritem in iteritems:
             self.assertEqual(len(iteritem), 3, msg='iteritem tuple is wrong length')
+            count += 1
+        self.assertEqual(count, length, msg='iteritems iterator is wrong length')
         iteritems = pri.iteritems(comments=False)
         self.assertIsInstance(iteritems, collections.Iterator, msg='result of iteritems() not an iterator')
-        self.assertEqual(len(list(iteritems)), len(pri), msg='iteritems iterator is wrong length')
+        count = 0
         for iteritem in iteritems:
             self.assertEqual(len(iteritem), 2, msg='iteritem tuple is wrong length')
+            count += 1
+        self.assertEqual(count, length, msg='iteritems iterator is wrong length')
         # itercards
         itercards = pri.itercards()
         self.assertIsInstance(itercards, collections.Iterator, msg='result of itercards() not an iterator')
-        self.assertEqual(len(list(itercards)), len(pri), msg='itercards iterator is wrong length')
+        self.assertEqual(count_items(itercards), length, msg='itercards iterator is wrong length')
         # iter
         _iter = iter(pri)
         self.assertIsInstance(_iter, collections.Iterator, msg='result of iter() not an iterator')
-        self.assertEqual(len(list(_iter)), len(pri), msg='iter iterator is wrong length')
+        self.assertEqual(count_items(_iter), length, msg='iter iterator is wrong length')
         del pri.hdr
         _iter = iter(pri)
         self.assertIsInstance(_iter, collections.Iterator, msg='result of iter() not an iterator')
-        self.assertEqual(len(list(_iter)), len(pri), msg='iter iterator is wrong length')
+        self.assertEqual(count_items(_iter), len(pri), msg='iter iterator is wrong length')
         self.assertEqual(len(list(_iter)), 0, msg='iter iterator is wrong length')
 
 
@@ -1456,13 +1499,6 @@ class header_read_getval_test(unittest.TestCase):
        Are values in a FITS file header read correctly?
     """
 
-    def setUp(self):
-        build_test_data_sef()
-        build_test_data_mef()
-
-    def tearDown(self):
-        delete_test_data()
-
     def test_read_getval(self):
         print(self.__class__.__name__)
         # default ext=0
@@ -1541,10 +1577,10 @@ class header_write_fits_keywords_dict_test(unittest.TestCase):
             self.assertEqual(new[keyword], pri[keyword], msg='%s keyword values do not match' % keyword)
             self.assertEqual(new.cards[keyword].comment, pri.cards[keyword].comment,
                              msg='%s keyword comments do not match' % keyword)
-            self.assertEqual(getattr(new, keyword).value, getattr(pri, keyword).value,
-                             msg='%s attribute values do not match' % keyword)
-            self.assertEqual(getattr(new, keyword).comment, getattr(pri, keyword).comment,
-                             msg='%s attribute comments do not match' % keyword)
+            new_attr = getattr(new, keyword)
+            pri_attr = getattr(pri, keyword)
+            self.assertEqual(new_attr.value, pri_attr.value, msg='%s attribute values do not match' % keyword)
+            self.assertEqual(new_attr.comment, pri_attr.comment, msg='%s attribute comments do not match' % keyword)
         new.new()
         new['XTENSION'] = ('IMAGE', 'Image extension')
         new['BITPIX'] = (8, 'array data type')
@@ -1557,10 +1593,10 @@ class header_write_fits_keywords_dict_test(unittest.TestCase):
             self.assertEqual(new[keyword], ext[keyword], msg='%s keyword values do not match' % keyword)
             self.assertEqual(new.cards[keyword].comment, ext.cards[keyword].comment,
                              msg='%s keyword comments do not match' % keyword)
-            self.assertEqual(getattr(new, keyword).value, getattr(ext, keyword).value,
-                             msg='%s attribute values do not match' % keyword)
-            self.assertEqual(getattr(new, keyword).comment, getattr(ext, keyword).comment,
-                             msg='%s attribute comments do not match' % keyword)
+            new_attr = getattr(new, keyword)
+            ext_attr = getattr(ext, keyword)
+            self.assertEqual(new_attr.value, ext_attr.value, msg='%s attribute values do not match' % keyword)
+            self.assertEqual(new_attr.comment, ext_attr.comment, msg='%s attribute comments do not match' % keyword)
 
 
 class header_write_fits_keywords_attr_test(unittest.TestCase):
@@ -1569,12 +1605,7 @@ class header_write_fits_keywords_attr_test(unittest.TestCase):
        Are cards written to the header attribute correctly?
     """
 
-    def setUp(self):
-        pass
-
-    def tearDown(self):
-        pass
-
+    @unittest.skip('writing to attribute is not yet supported')
     def test_write_fits_keywords_attr(self):
         print(self.__class__.__name__)
         ''' writing to attribute is not yet supported '''
@@ -1602,20 +1633,18 @@ class header_write_hierarch_keywords_dict_test(unittest.TestCase):
         pri['verylongkeyword'] = 'verylongkeywordvalue'
         pri['keyword with spaces'] = 'keyword with spaces value'
         pri['|<37W0R>'] = 'non-standard characters value'
-        self.assertEqual(pri['DARMA Hierarch Card 1'], 'one', msg='HIERARCH card 1 keyword value incorrect')
-        self.assertEqual(pri['DARMA Hierarch Card 2'], 2, msg='HIERARCH card 2 keyword value incorrect')
-        self.assertEqual(pri['DARMA Hierarch Card 3'], 3.0, msg='HIERARCH card 3 keyword value incorrect')
-        self.assertEqual(pri['verylongkeyword'], 'verylongkeywordvalue', msg='long keyword value incorrect')
-        self.assertEqual(pri['keyword with spaces'], 'keyword with spaces value', msg='spaces keyword value incorrect')
-        self.assertEqual(pri['|<37W0R>'], 'non-standard characters value', msg='non-standard keyword value incorrect')
-        self.assertEqual(pri['HIERARCH DARMA Hierarch Card 1'], 'one', msg='HIERARCH card 1 keyword value incorrect')
-        self.assertEqual(pri['HIERARCH DARMA Hierarch Card 2'], 2, msg='HIERARCH card 2 keyword value incorrect')
-        self.assertEqual(pri['HIERARCH DARMA Hierarch Card 3'], 3.0, msg='HIERARCH card 3 keyword value incorrect')
-        self.assertEqual(pri['HIERARCH verylongkeyword'], 'verylongkeywordvalue', msg='long keyword value incorrect')
-        self.assertEqual(pri['HIERARCH keyword with spaces'], 'keyword with spaces value',
-                         msg='spaces keyword value incorrect')
-        self.assertEqual(pri['HIERARCH |<37W0R>'], 'non-standard characters value',
-                         msg='non-standard keyword value incorrect')
+        expected = [
+            ('DARMA Hierarch Card 1', 'one', 'HIERARCH card 1 keyword value incorrect'),
+            ('DARMA Hierarch Card 2', 2, 'HIERARCH card 2 keyword value incorrect'),
+            ('DARMA Hierarch Card 3', 3.0, 'HIERARCH card 3 keyword value incorrect'),
+            ('verylongkeyword', 'verylongkeywordvalue', 'long keyword value incorrect'),
+            ('keyword with spaces', 'keyword with spaces value', 'spaces keyword value incorrect'),
+            ('|<37W0R>', 'non-standard characters value', 'non-standard keyword value incorrect'),
+        ]
+        # with and without the HIERARCH prefix
+        for prefix in ('', 'HIERARCH '):
+            for keyword, value, msg in expected:
+                self.assertEqual(pri[prefix + keyword], value, msg=msg)
         self.assertEqual(getattr(pri, 'HIERARCH_DARMA_Hierarch_Card_1').value,
                          'one', msg='HIERARCH card 1 attribute value incorrect')
         self.assertEqual(getattr(pri, 'HIERARCH_DARMA_Hierarch_Card_2').value,
@@ -1636,12 +1665,7 @@ class header_write_hierarch_keywords_attr_test(unittest.TestCase):
        Are HIERARCH cards written to the header attribute correctly?
     """
 
-    def setUp(self):
-        pass
-
-    def tearDown(self):
-        pass
-
+    @unittest.skip('writing to attribute is not yet supported')
     def test_write_hierarch_keywords_attr(self):
         print(self.__class__.__name__)
         ''' writing to attribute is not yet supported '''
@@ -1663,9 +1687,8 @@ class header_write_blanks_test(unittest.TestCase):
     def test_write_blanks(self):
         print(self.__class__.__name__)
         pri = self.pri
-        pri[''] = 'DARMA Blank Card 1'
-        pri[''] = 'DARMA Blank Card 2'
-        pri[''] = 'DARMA Blank Card 3'
+        for num in (1, 2, 3):
+            pri[''] = 'DARMA Blank Card %d' % num
         blanks = pri.get_blank()
         self.assertEqual(len(blanks), 3, msg='incorrect number of added blank crds')
         self.assertEqual(blanks[0], 'DARMA Blank Card 1', msg='BLANK card 1 value is incorrect')
@@ -1688,9 +1711,8 @@ class header_write_comments_test(unittest.TestCase):
     def test_write_comments(self):
         print(self.__class__.__name__)
         pri = self.pri
-        pri['COMMENT'] = 'DARMA Comment Card 1'
-        pri['COMMENT'] = 'DARMA Comment Card 2'
-        pri['COMMENT'] = 'DARMA Comment Card 3'
+        for num in (1, 2, 3):
+            pri['COMMENT'] = 'DARMA Comment Card %d' % num
         comments = pri.get_comment()
         self.assertEqual(len(comments), 3, msg='incorrect number of added comments')
         self.assertEqual(comments[0], 'DARMA Comment Card 1', msg='COMMENT card 1 value is incorrect')
@@ -1713,9 +1735,8 @@ class header_write_history_test(unittest.TestCase):
     def test_write_history(self):
         print(self.__class__.__name__)
         pri = self.pri
-        pri['HISTORY'] = 'DARMA History Card 1'
-        pri['HISTORY'] = 'DARMA History Card 2'
-        pri['HISTORY'] = 'DARMA History Card 3'
+        for num in (1, 2, 3):
+            pri['HISTORY'] = 'DARMA History Card %d' % num
         histories = pri.get_history()
         self.assertEqual(len(histories), 3, msg='incorrect number of added histories')
         self.assertEqual(histories[0], 'DARMA History Card 1', msg='HISTORY card 1 value is incorrect')
@@ -1738,70 +1759,25 @@ class header_write_rename_keyword_test(unittest.TestCase):
     def test_write_rename_keyword(self):
         print(self.__class__.__name__)
         crd = self.crd
-        self.assertRaises(DARMAError, crd.rename_keyword, 'KEYWORD1', 'COMMENT')
-        self.assertRaises(DARMAError, crd.rename_keyword, 'COMMENT', 'KEYWORD1')
-        self.assertRaises(DARMAError, crd.rename_keyword, 'KEYWORD1', 'HISTORY')
-        self.assertRaises(DARMAError, crd.rename_keyword, 'HISTORY', 'KEYWORD1')
-        self.assertRaises(DARMAError, crd.rename_keyword, 'KEYWORD1', '')
-        self.assertRaises(DARMAError, crd.rename_keyword, '', 'KEYWORD1')
+        # COMMENT, HISTORY, and blank keywords cannot be renamed
+        for old, new in [('KEYWORD1', 'COMMENT'), ('COMMENT', 'KEYWORD1'), ('KEYWORD1', 'HISTORY'),
+                         ('HISTORY', 'KEYWORD1'), ('KEYWORD1', ''), ('', 'KEYWORD1')]:
+            self.assertRaises(DARMAError, crd.rename_keyword, old, new)
         crd['KEYWORD1'] = 'one'
         crd['KEYWORD2'] = 2
         crd['HIERARCH Keyword 1'] = 1.0
         crd['HIERARCH Keyword 2'] = 'two'
-        self.assertEqual(crd['KEYWORD1'], 'one', msg='KEYWORD1 value has wrong value')
-        self.assertEqual(crd['KEYWORD2'], 2, msg='KEYWORD2 value has wrong value')
-        self.assertEqual(crd['KEYWORD3'], None, msg='KEYWORD3 value has wrong value')
-        self.assertEqual(crd['KEYWORD4'], None, msg='KEYWORD4 value has wrong value')
-        self.assertEqual(crd['HIERARCH Keyword 1'], 1.0, msg='HIERARCH Keyword 1 value has wrong value')
-        self.assertEqual(crd['HIERARCH Keyword 2'], 'two', msg='HIERARCH Keyword 2 value has wrong value')
-        self.assertEqual(crd['HIERARCH Keyword 3'], None, msg='HIERARCH Keyword 3 value has wrong value')
-        self.assertEqual(crd['HIERARCH Keyword 4'], None, msg='HIERARCH Keyword 4 value has wrong value')
-        self.assertEqual(getattr(crd, 'KEYWORD1').value, 'one', msg='KEYWORD1 attribute has wrong value')
-        self.assertEqual(getattr(crd, 'KEYWORD2').value, 2, msg='KEYWORD2 attrivute has wrong value')
-        self.assertRaises(AttributeError, getattr, crd, 'KEYWORD3')
-        self.assertRaises(AttributeError, getattr, crd, 'KEYWORD4')
-        self.assertEqual(getattr(crd, 'HIERARCH_Keyword_1').value, 1.0,
-                         msg='HIERARCH Keyword 1 attribute has wrong value')
-        self.assertEqual(getattr(crd, 'HIERARCH_Keyword_2').value, 'two',
-                         msg='HIERARCH Keyword 2 attrivute has wrong value')
-        self.assertRaises(AttributeError, getattr, crd, 'HIERARCH_Keyword_3')
-        self.assertRaises(AttributeError, getattr, crd, 'HIERARCH_Keyword_4')
+        check_renamed_keywords(self, crd, RENAMED_BEFORE)
         crd.rename_keyword('KEYWORD1', 'KEYWORD3')
         crd.rename_keyword('KEYWORD2', 'KEYWORD4')
         crd.rename_keyword('HIERARCH Keyword 1', 'HIERARCH Keyword 3')
         crd.rename_keyword('HIERARCH Keyword 2', 'HIERARCH Keyword 4')
-        self.assertEqual(crd['KEYWORD1'], None, msg='KEYWORD1 value has wrong value')
-        self.assertEqual(crd['KEYWORD2'], None, msg='KEYWORD2 value has wrong value')
-        self.assertEqual(crd['KEYWORD3'], 'one', msg='KEYWORD3 value has wrong value')
-        self.assertEqual(crd['KEYWORD4'], 2, msg='KEYWORD4 value has wrong value')
-        self.assertEqual(crd['HIERARCH Keyword 1'], None, msg='HIERARCH Keyword 1 value has wrong value')
-        self.assertEqual(crd['HIERARCH Keyword 2'], None, msg='HIERARCH Keyword 2 value has wrong value')
-        self.assertEqual(crd['HIERARCH Keyword 3'], 1.0, msg='HIERARCH Keyword 3 value has wrong value')
-        self.assertEqual(crd['HIERARCH Keyword 4'], 'two', msg='HIERARCH Keyword 4 value has wrong value')
-        self.assertRaises(AttributeError, getattr, crd, 'KEYWORD1')
-        self.assertRaises(AttributeError, getattr, crd, 'KEYWORD2')
-        self.assertEqual(getattr(crd, 'KEYWORD3').value, 'one', msg='KEYWORD3 attribute has wrong value')
-        self.assertEqual(getattr(crd, 'KEYWORD4').value, 2, msg='KEYWORD4 attrivute has wrong value')
-        self.assertRaises(AttributeError, getattr, crd, 'HIERARCH_Keyword_1')
-        self.assertRaises(AttributeError, getattr, crd, 'HIERARCH_Keyword_2')
-        self.assertEqual(getattr(crd, 'HIERARCH_Keyword_3').value, 1.0,
-                         msg='HIERARCH Keyword 3 attribute has wrong value')
-        self.assertEqual(getattr(crd, 'HIERARCH_Keyword_4').value, 'two',
-                         msg='HIERARCH Keyword 4 attrivute has wrong value')
-        self.assertRaises(DARMAError, crd.rename_keyword, 'KEYWORD3', 'KEYWORD4')
-        self.assertRaises(DARMAError, crd.rename_keyword, 'KEYWORD4', 'KEYWORD3')
-        self.assertRaises(DARMAError, crd.rename_keyword, 'HIERARCH Keyword 3', 'HIERARCH Keyword 4')
-        self.assertRaises(DARMAError, crd.rename_keyword, 'HIERARCH Keyword 4', 'HIERARCH Keyword 3')
-        self.assertEqual(crd['KEYWORD3'], 'one', msg='KEYWORD4 has been overwritten')
-        self.assertEqual(crd['KEYWORD4'], 2,     msg='KEYWORD5 has been overwritten')
-        self.assertEqual(crd['HIERARCH Keyword 3'], 1.0, msg='HIERARCH Keyword 4 has been overwritten')
-        self.assertEqual(crd['HIERARCH Keyword 4'], 'two',     msg='HIERARCH Keyword 5 has been overwritten')
-        self.assertEqual(getattr(crd, 'KEYWORD3').value, 'one', msg='KEYWORD3 attribute has wrong value')
-        self.assertEqual(getattr(crd, 'KEYWORD4').value, 2, msg='KEYWORD4 attrivute has wrong value')
-        self.assertEqual(getattr(crd, 'HIERARCH_Keyword_3').value, 1.0,
-                         msg='HIERARCH Keyword 3 attribute has wrong value')
-        self.assertEqual(getattr(crd, 'HIERARCH_Keyword_4').value, 'two',
-                         msg='HIERARCH Keyword 4 attrivute has wrong value')
+        check_renamed_keywords(self, crd, RENAMED_AFTER)
+        # existing keywords cannot be overwritten
+        for old, new in [('KEYWORD3', 'KEYWORD4'), ('KEYWORD4', 'KEYWORD3'),
+                         ('HIERARCH Keyword 3', 'HIERARCH Keyword 4'), ('HIERARCH Keyword 4', 'HIERARCH Keyword 3')]:
+            self.assertRaises(DARMAError, crd.rename_keyword, old, new)
+        check_renamed_keywords(self, crd, RENAMED_AFTER)
 
 
 class header_write_rename_key_test(unittest.TestCase):
@@ -1819,70 +1795,25 @@ class header_write_rename_key_test(unittest.TestCase):
     def test_write_rename_key(self):
         print(self.__class__.__name__)
         crd = self.crd
-        self.assertRaises(DARMAError, crd.rename_key, 'KEYWORD1', 'COMMENT')
-        self.assertRaises(DARMAError, crd.rename_key, 'COMMENT', 'KEYWORD1')
-        self.assertRaises(DARMAError, crd.rename_key, 'KEYWORD1', 'HISTORY')
-        self.assertRaises(DARMAError, crd.rename_key, 'HISTORY', 'KEYWORD1')
-        self.assertRaises(DARMAError, crd.rename_key, 'KEYWORD1', '')
-        self.assertRaises(DARMAError, crd.rename_key, '', 'KEYWORD1')
+        # COMMENT, HISTORY, and blank keywords cannot be renamed
+        for old, new in [('KEYWORD1', 'COMMENT'), ('COMMENT', 'KEYWORD1'), ('KEYWORD1', 'HISTORY'),
+                         ('HISTORY', 'KEYWORD1'), ('KEYWORD1', ''), ('', 'KEYWORD1')]:
+            self.assertRaises(DARMAError, crd.rename_key, old, new)
         crd['KEYWORD1'] = 'one'
         crd['KEYWORD2'] = 2
         crd['HIERARCH Keyword 1'] = 1.0
         crd['HIERARCH Keyword 2'] = 'two'
-        self.assertEqual(crd['KEYWORD1'], 'one', msg='KEYWORD1 value has wrong value')
-        self.assertEqual(crd['KEYWORD2'], 2, msg='KEYWORD2 value has wrong value')
-        self.assertEqual(crd['KEYWORD3'], None, msg='KEYWORD3 value has wrong value')
-        self.assertEqual(crd['KEYWORD4'], None, msg='KEYWORD4 value has wrong value')
-        self.assertEqual(crd['HIERARCH Keyword 1'], 1.0, msg='HIERARCH Keyword 1 value has wrong value')
-        self.assertEqual(crd['HIERARCH Keyword 2'], 'two', msg='HIERARCH Keyword 2 value has wrong value')
-        self.assertEqual(crd['HIERARCH Keyword 3'], None, msg='HIERARCH Keyword 3 value has wrong value')
-        self.assertEqual(crd['HIERARCH Keyword 4'], None, msg='HIERARCH Keyword 4 value has wrong value')
-        self.assertEqual(getattr(crd, 'KEYWORD1').value, 'one', msg='KEYWORD1 attribute has wrong value')
-        self.assertEqual(getattr(crd, 'KEYWORD2').value, 2, msg='KEYWORD2 attrivute has wrong value')
-        self.assertRaises(AttributeError, getattr, crd, 'KEYWORD3')
-        self.assertRaises(AttributeError, getattr, crd, 'KEYWORD4')
-        self.assertEqual(getattr(crd, 'HIERARCH_Keyword_1').value, 1.0,
-                         msg='HIERARCH Keyword 1 attribute has wrong value')
-        self.assertEqual(getattr(crd, 'HIERARCH_Keyword_2').value, 'two',
-                         msg='HIERARCH Keyword 2 attrivute has wrong value')
-        self.assertRaises(AttributeError, getattr, crd, 'HIERARCH_Keyword_3')
-        self.assertRaises(AttributeError, getattr, crd, 'HIERARCH_Keyword_4')
+        check_renamed_keywords(self, crd, RENAMED_BEFORE)
         crd.rename_key('KEYWORD1', 'KEYWORD3')
         crd.rename_key('KEYWORD2', 'KEYWORD4')
         crd.rename_key('HIERARCH Keyword 1', 'HIERARCH Keyword 3')
         crd.rename_key('HIERARCH Keyword 2', 'HIERARCH Keyword 4')
-        self.assertEqual(crd['KEYWORD1'], None, msg='KEYWORD1 value has wrong value')
-        self.assertEqual(crd['KEYWORD2'], None, msg='KEYWORD2 value has wrong value')
-        self.assertEqual(crd['KEYWORD3'], 'one', msg='KEYWORD3 value has wrong value')
-        self.assertEqual(crd['KEYWORD4'], 2, msg='KEYWORD4 value has wrong value')
-        self.assertEqual(crd['HIERARCH Keyword 1'], None, msg='HIERARCH Keyword 1 value has wrong value')
-        self.assertEqual(crd['HIERARCH Keyword 2'], None, msg='HIERARCH Keyword 2 value has wrong value')
-        self.assertEqual(crd['HIERARCH Keyword 3'], 1.0, msg='HIERARCH Keyword 3 value has wrong value')
-        self.assertEqual(crd['HIERARCH Keyword 4'], 'two', msg='HIERARCH Keyword 4 value has wrong value')
-        self.assertRaises(AttributeError, getattr, crd, 'KEYWORD1')
-        self.assertRaises(AttributeError, getattr, crd, 'KEYWORD2')
-        self.assertEqual(getattr(crd, 'KEYWORD3').value, 'one', msg='KEYWORD3 attribute has wrong value')
-        self.assertEqual(getattr(crd, 'KEYWORD4').value, 2, msg='KEYWORD4 attrivute has wrong value')
-        self.assertRaises(AttributeError, getattr, crd, 'HIERARCH_Keyword_1')
-        self.assertRaises(AttributeError, getattr, crd, 'HIERARCH_Keyword_2')
-        self.assertEqual(getattr(crd, 'HIERARCH_Keyword_3').value, 1.0,
-                         msg='HIERARCH Keyword 3 attribute has wrong value')
-        self.assertEqual(getattr(crd, 'HIERARCH_Keyword_4').value, 'two',
-                         msg='HIERARCH Keyword 4 attrivute has wrong value')
-        self.assertRaises(DARMAError, crd.rename_key, 'KEYWORD3', 'KEYWORD4')
-        self.assertRaises(DARMAError, crd.rename_key, 'KEYWORD4', 'KEYWORD3')
-        self.assertRaises(DARMAError, crd.rename_key, 'HIERARCH Keyword 3', 'HIERARCH Keyword 4')
-        self.assertRaises(DARMAError, crd.rename_key, 'HIERARCH Keyword 4', 'HIERARCH Keyword 3')
-        self.assertEqual(crd['KEYWORD3'], 'one', msg='KEYWORD4 has been overwritten')
-        self.assertEqual(crd['KEYWORD4'], 2,     msg='KEYWORD5 has been overwritten')
-        self.assertEqual(crd['HIERARCH Keyword 3'], 1.0, msg='HIERARCH Keyword 4 has been overwritten')
-        self.assertEqual(crd['HIERARCH Keyword 4'], 'two',     msg='HIERARCH Keyword 5 has been overwritten')
-        self.assertEqual(getattr(crd, 'KEYWORD3').value, 'one', msg='KEYWORD3 attribute has wrong value')
-        self.assertEqual(getattr(crd, 'KEYWORD4').value, 2, msg='KEYWORD4 attrivute has wrong value')
-        self.assertEqual(getattr(crd, 'HIERARCH_Keyword_3').value, 1.0,
-                         msg='HIERARCH Keyword 3 attribute has wrong value')
-        self.assertEqual(getattr(crd, 'HIERARCH_Keyword_4').value, 'two',
-                         msg='HIERARCH Keyword 4 attrivute has wrong value')
+        check_renamed_keywords(self, crd, RENAMED_AFTER)
+        # existing keywords cannot be overwritten
+        for old, new in [('KEYWORD3', 'KEYWORD4'), ('KEYWORD4', 'KEYWORD3'),
+                         ('HIERARCH Keyword 3', 'HIERARCH Keyword 4'), ('HIERARCH Keyword 4', 'HIERARCH Keyword 3')]:
+            self.assertRaises(DARMAError, crd.rename_key, old, new)
+        check_renamed_keywords(self, crd, RENAMED_AFTER)
 
 
 class header_write_add_test(unittest.TestCase):
@@ -2144,7 +2075,7 @@ class header_write_merge_test(unittest.TestCase):
     def setUp(self):
         self.pri = header().default()
         self.ext = header().default(type='image')
-        self.crd = header(cardlist=CARDS)
+        self.crd = cards_header()
 
     def tearDown(self):
         del self.pri, self.ext, self.crd
@@ -2178,9 +2109,9 @@ class header_write_merge_test(unittest.TestCase):
         self.assertEqual(mer['HIERARCH Keyword 1'], 'one', msg='HIERARCH Keyword 1 not in merged header')
         mer = pri.merge(crd, clobber=True)
         self.assertEqual(len(mer.get_blank()), len(BLANK), msg='incorrect number of BLANK cards in merged header')
-        self.assertEqual(len(mer.get_comment()), len(COMMENT + COMMENTCARDS),
+        self.assertEqual(len(mer.get_comment()), NUM_COMMENTS,
                          msg='incorrect number of COMMENT cards in merged header')
-        self.assertEqual(len(mer.get_history()), len(HISTORY + HISTORYCARDS),
+        self.assertEqual(len(mer.get_history()), NUM_HISTORIES,
                          msg='incorrect number of HISTORY cards in merged header')
 
 
@@ -2191,22 +2122,25 @@ class header_write_merge_into_file_test(unittest.TestCase):
     """
 
     def setUp(self):
-        build_test_data_mef()
-        self.ext = header(filename=MULTI1, extension=1)
+        # This test modifies the file, so it works on its own copy.
+        self.filename = os.path.join(TEST_DIR, 'merge.fits')
+        shutil.copyfile(MULTI1, self.filename)
+        self.ext = header(filename=self.filename, extension=1)
 
     def tearDown(self):
-        delete_test_data()
         del self.ext
+        remove_test_file(self.filename)
 
     def test_write_merge_into_file(self):
         print(self.__class__.__name__)
+        filename = self.filename
         ext = self.ext
         ext['KEYWORD1'] = 1.0
         ext['KEYWORD2'] = 2
         ext['HIERARCH Keyword 1'] = 'one'
         ext['HIERARCH Keyword 2'] = 2.0
-        ext.merge_into_file(MULTI1)
-        sef = header(filename=MULTI1)
+        ext.merge_into_file(filename)
+        sef = header(filename=filename)
         self.assertEqual(sef['KEYWORD1'], 1.0, msg='KEYWORD1 not in merged header')
         self.assertEqual(sef['KEYWORD2'], 2, msg='KEYWORD2 not in merged header')
         self.assertEqual(sef['HIERARCH Keyword 1'], 'one', msg='HIERARCH Keyword 1 not in merged header')
@@ -2215,19 +2149,39 @@ class header_write_merge_into_file_test(unittest.TestCase):
         ext['KEYWORD2'] = 2.0
         ext['HIERARCH Keyword 1'] = 1
         ext['HIERARCH Keyword 2'] = 'two'
-        ext.merge_into_file(MULTI1, clobber=False)
-        sef = header(filename=MULTI1)
+        ext.merge_into_file(filename, clobber=False)
+        sef = header(filename=filename)
         self.assertEqual(sef['KEYWORD1'], 1.0, msg='KEYWORD1 not in merged header')
         self.assertEqual(sef['KEYWORD2'], 2, msg='KEYWORD2 not in merged header')
         self.assertEqual(sef['HIERARCH Keyword 1'], 'one', msg='HIERARCH Keyword 1 not in merged header')
         self.assertEqual(sef['HIERARCH Keyword 2'], 2.0, msg='HIERARCH Keyword 2 not in merged header')
-        ext.merge_into_file(MULTI1, clobber=True)
-        sef = header(filename=MULTI1)
+        ext.merge_into_file(filename, clobber=True)
+        sef = header(filename=filename)
         self.assertEqual(sef['KEYWORD1'], 'one', msg='KEYWORD1 not in merged header')
         self.assertEqual(sef['KEYWORD2'], 2.0, msg='KEYWORD2 not in merged header')
         self.assertEqual(sef['HIERARCH Keyword 1'], 1, msg='HIERARCH Keyword 1 not in merged header')
         self.assertEqual(sef['HIERARCH Keyword 2'], 'two', msg='HIERARCH Keyword 2 not in merged header')
 
+
+class header_write_attribute_names_test(unittest.TestCase):
+
+    """
+       Are keywords set as attributes with the same names as loaded
+       keywords, and is the cache of attribute names bounded?
+    """
+
+    def test_write_attribute_names(self):
+        print(self.__class__.__name__)
+        crd = header(cardlist=CARDS)
+        crd['HIERARCH Key 1'] = (1.0, 'HIERARCH keyword 1')
+        crd['KEY-2'] = 2
+        self.assertEqual(getattr(crd, 'HIERARCH_Key_1').value, 1.0, msg='HIERARCH Key 1 attribute has wrong value')
+        self.assertFalse(hasattr(crd, 'HIERARCH_Key 1'), msg='HIERARCH Key 1 attribute name has a space')
+        self.assertEqual(getattr(crd, 'KEY_2').value, 2, msg='KEY-2 attribute has wrong value')
+        for num in range(_MAX_ATTRIBUTE_NAMES + 10):
+            self.assertEqual(_attribute_name('KEY-%d' % num), 'KEY_%d' % num, msg='wrong attribute name')
+        self.assertLessEqual(len(_ATTRIBUTE_NAMES), _MAX_ATTRIBUTE_NAMES, msg='attribute name cache not bounded')
+
 ########################################################################
 #
 # header delete tests
@@ -5,6 +5,365 @@ Unit test for DARMA tables
 __version__ = '@(#)$Revision$'
 
 from ..common import DARMAError
+from ..header import header
+from ..tables import columns, tables
+from .common_test import fits, Array
 
 import unittest
 import os
+import shutil
+import sys
+import tempfile
+try:
+    from StringIO import StringIO
+except ImportError:
+    # Python 3
+    from io import StringIO
+
+# AstroPy/PyFITS compatibility
+try:
+    new_table = fits.BinTableHDU.from_columns
+except AttributeError:
+    # PyFITS < 3.3
+    new_table = fits.new_table
+
+# The test data are built once per module in a directory created by
+# setUpModule(), which also sets the file names.
+TEST_DIR = None
+TABLE1 = None
+
+# Column data of the tables in TABLE1.  The tests do not modify them.
+COLUMN_A = Array.arange(10, dtype='float32')
+COLUMN_B = Array.arange(10, 20, dtype='int32')
+
+
+def build_test_data_table():
+    """
+       This function builds a FITS file with the binary tables T1
+       (columns a and b) and T2 (column table, named like an attribute
+       of columns) to be used in testing
+    """
+    cols = [fits.Column('a', 'E', array=COLUMN_A),
+            fits.Column('b', 'J', array=COLUMN_B)]
+    hdus = fits.HDUList([fits.PrimaryHDU(), new_table(cols),
+                         new_table([fits.Column('table', 'J', array=COLUMN_B)])])
+    hdus[1].name = 'T1'
+    hdus[2].name = 'T2'
+    try:
+        hdus.writeto(TABLE1, output_verify='ignore', overwrite=True)
+    except TypeError:
+        # PyFITS and old Astropy versions only know clobber
+        hdus.writeto(TABLE1, output_verify='ignore', clobber=True)
+
+
+def setUpModule():
+    global TEST_DIR, TABLE1
+    TEST_DIR = tempfile.mkdtemp(prefix='darma_tables_test_')
+    TABLE1 = os.path.join(TEST_DIR, 'TABLE1.fits')
+    # tearDownModule is not called if setUpModule fails, so clean up
+    # the test directory here in that case.
+    try:
+        build_test_data_table()
+    except:
+        tearDownModule()
+        raise
+
+
+def tearDownModule():
+    shutil.rmtree(TEST_DIR, ignore_errors=True)
+
+########################################################################
+#
+# columns load tests
+#
+
+
+class columns_load_test(unittest.TestCase):
+
+    """
+       Are columns loaded from a file independent of each other?
+    """
+
+    def test_load_independent(self):
+        print(self.__class__.__name__)
+        cols1 = columns(filename=TABLE1, name='T1')
+        cols2 = columns(filename=TABLE1, name='T1')
+        cols1.load()
+        cols2.load()
+        self.assertIsNot(cols1.table, cols2.table, msg='columns share their table')
+        cols1.a = Array.zeros(10, dtype='float32')
+        self.assertTrue((cols1.a == 0).all(), msg='column a not set')
+        self.assertTrue((cols2.a == COLUMN_A).all(), msg='column a set in other columns')
+
+
+class columns_load_error_test(unittest.TestCase):
+
+    """
+       Do columns loaded from a bogus table raise errors and leave no
+       file open?
+    """
+
+    def test_load_error(self):
+        print(self.__class__.__name__)
+        cols = columns(filename=TABLE1, name='UNKNOWN')
+        for _ in range(3):
+            self.assertRaises(DARMAError, cols.load)
+            self.assertIsNone(cols.table, msg='table set after failed load')
+            self.assertEqual(len(cols.hdus), 0, msg='HDUList kept after failed load')
+
+
+class columns_attribute_name_test(unittest.TestCase):
+
+    """
+       Do columns named like attributes of columns leave those
+       attributes alone?
+    """
+
+    def test_attribute_name(self):
+        print(self.__class__.__name__)
+        cols = columns(filename=TABLE1, name='T2')
+        cols.load()
+        self.assertIsInstance(cols.table, fits.BinTableHDU, msg='table attribute is not the table HDU')
+        self.assertTrue((cols['table'] == COLUMN_B).all(), msg='column table has wrong data')
+        cols['table'] = Array.zeros(10, dtype='int32')
+        self.assertIsInstance(cols.table, fits.BinTableHDU, msg='table attribute replaced by column data')
+        self.assertTrue((cols['table'] == 0).all(), msg='column table not set')
+        cols.__del__()
+        self.assertIsNone(cols.table, msg='table not removed')
+
+########################################################################
+#
+# columns read tests
+#
+
+
+class columns_read_to_soa_test(unittest.TestCase):
+
+    """
+       Does to_soa() return contiguous, read-only copies of the columns
+       that follow changes of the columns?
+    """
+
+    def setUp(self):
+        self.cols = columns(filename=TABLE1, name='T1')
+
+    def test_read_to_soa(self):
+        print(self.__class__.__name__)
+        cols = self.cols
+        soa = cols.to_soa()
+        self.assertEqual(sorted(soa), ['a', 'b'], msg='to_soa returned wrong columns')
+        for name, data in [('a', COLUMN_A), ('b', COLUMN_B)]:
+            self.assertTrue(soa[name].flags['C_CONTIGUOUS'], msg='column %s not contiguous' % name)
+            self.assertFalse(soa[name].flags['WRITEABLE'], msg='column %s writeable' % name)
+            self.assertTrue((soa[name] == data).all(), msg='column %s has wrong data' % name)
+            self.assertFalse(Array.may_share_memory(soa[name], cols[name]), msg='column %s not copied' % name)
+        self.assertRaises(ValueError, soa['a'].__setitem__, 0, 1.0)
+        self.assertEqual(list(cols.to_soa(names=['b'])), ['b'], msg='to_soa ignored names')
+
+    def test_read_to_soa_set(self):
+        print(self.__class__.__name__)
+        cols = self.cols
+        soa = cols.to_soa()
+        cols.a = COLUMN_A * 2
+        self.assertTrue((cols.to_soa()['a'] == COLUMN_A * 2).all(), msg='to_soa not updated after column set')
+        self.assertIs(cols.to_soa()['b'], soa['b'], msg='unchanged column b not cached')
+        cols['c'] = COLUMN_B * 2
+        new_soa = cols.to_soa()
+        self.assertEqual(sorted(new_soa), ['a', 'b', 'c'], msg='to_soa not updated after column added')
+        self.assertIsNot(new_soa['b'], soa['b'], msg='to_soa cache kept after column added')
+        self.assertTrue((new_soa['c'] == COLUMN_B * 2).all(), msg='column c has wrong data')
+        del cols.c
+        self.assertEqual(sorted(cols.to_soa()), ['a', 'b'], msg='to_soa not updated after column deleted')
+
+
+class columns_read_rows_test(unittest.TestCase):
+
+    """
+       Does rows() return contiguous copies of the columns over the
+       requested rows?
+    """
+
+    def setUp(self):
+        self.cols = columns(filename=TABLE1, name='T1')
+
+    def test_read_rows(self):
+        print(self.__class__.__name__)
+        cols = self.cols
+        for start, stop in [(0, None), (2, 5), (8, None), (-3, None), (5, 100), (5, 5)]:
+            rows = cols.rows(start, stop)
+            self.assertEqual(sorted(rows), ['a', 'b'], msg='rows returned wrong columns')
+            for name, data in [('a', COLUMN_A), ('b', COLUMN_B)]:
+                self.assertTrue(rows[name].flags['C_CONTIGUOUS'], msg='column %s not contiguous' % name)
+                self.assertEqual(list(rows[name]), list(data[start:stop]),
+                                 msg='column %s has wrong rows %s:%s' % (name, start, stop))
+        rows = cols.rows()
+        rows['a'][0] = -1.0
+        self.assertEqual(cols.a[0], COLUMN_A[0], msg='rows did not copy column a')
+        # The only column of a table is contiguous already.
+        cols = columns(filename=TABLE1, name='T2')
+        rows = cols.rows()
+        rows['table'][0] = -1
+        self.assertEqual(cols['table'][0], COLUMN_B[0], msg='rows did not copy contiguous column table')
+
+########################################################################
+#
+# columns write tests
+#
+
+
+class columns_write_header_test(unittest.TestCase):
+
+    """
+       Is the header of columns built from the table and settable?
+    """
+
+    def test_write_header(self):
+        print(self.__class__.__name__)
+        cols = columns(filename=TABLE1, name='T1')
+        self.assertEqual(cols.header['EXTNAME'], 'T1', msg='header not built from table')
+        hdr = header()
+        cols.header = hdr
+        self.assertIs(cols.header, hdr, msg='header not set')
+
+
+class columns_write_batch_add_test(unittest.TestCase):
+
+    """
+       Are columns set in batch_add() blocks added when the outermost
+       block ends, and discarded if it raises an exception?
+    """
+
+    def setUp(self):
+        self.cols = columns(filename=TABLE1, name='T1')
+
+    def test_write_batch_add(self):
+        print(self.__class__.__name__)
+        cols = self.cols
+        with cols.batch_add():
+            cols['c'] = COLUMN_A * 2
+            cols['d'] = COLUMN_B * 2
+            self.assertNotIn('c', cols, msg='column c added before end of block')
+        self.assertEqual(cols.names, ['a', 'b', 'c', 'd'], msg='columns not added')
+        self.assertTrue((cols.c == COLUMN_A * 2).all(), msg='column c has wrong data')
+        self.assertTrue((cols['d'] == COLUMN_B * 2).all(), msg='column d has wrong data')
+
+    def test_write_batch_add_error(self):
+        print(self.__class__.__name__)
+        cols = self.cols
+        try:
+            with cols.batch_add():
+                cols['c'] = COLUMN_A * 2
+                raise ValueError()
+        except ValueError:
+            pass
+        self.assertEqual(cols.names, ['a', 'b'], msg='columns added by failed block')
+        self.assertRaises(AttributeError, getattr, cols, 'c')
+
+    def test_write_batch_add_nested(self):
+        print(self.__class__.__name__)
+        cols = self.cols
+        with cols.batch_add():
+            cols['c'] = COLUMN_A * 2
+            with cols.batch_add():
+                cols['d'] = COLUMN_B * 2
+            self.assertNotIn('d', cols, msg='column d added before end of outer block')
+        self.assertEqual(cols.names, ['a', 'b', 'c', 'd'], msg='columns not added')
+        try:
+            with cols.batch_add():
+                cols['e'] = COLUMN_A
+                with cols.batch_add():
+                    cols['f'] = COLUMN_B
+                raise ValueError()
+        except ValueError:
+            pass
+        self.assertEqual(cols.names, ['a', 'b', 'c', 'd'], msg='columns added by failed block')
+
+    def test_write_batch_add_rebuilds(self):
+        print(self.__class__.__name__)
+        if not hasattr(fits, 'FITS_rec') or not hasattr(fits.FITS_rec, 'from_columns'):
+            self.skipTest('FITS_rec.from_columns not available')
+        cols = self.cols
+        cols.load()
+        from_columns = fits.FITS_rec.from_columns
+        calls = []
+
+        def counting_from_columns(*args, **kwargs):
+            calls.append(args)
+            return from_columns(*args, **kwargs)
+
+        fits.FITS_rec.from_columns = staticmethod(counting_from_columns)
+        try:
+            with cols.batch_add():
+                for num in range(5):
+                    cols['c%d' % num] = COLUMN_A * num
+                cols['c0'] = COLUMN_B
+        finally:
+            fits.FITS_rec.from_columns = from_columns
+        self.assertEqual(len(calls), 1, msg='table data rebuilt %d times' % len(calls))
+        self.assertEqual(cols.names, ['a', 'b', 'c0', 'c1', 'c2', 'c3', 'c4'], msg='columns not added once each')
+        self.assertTrue((cols.c0 == COLUMN_B).all(), msg='column c0 does not have the last data set')
+        self.assertTrue((cols.c4 == COLUMN_A * 4).all(), msg='column c4 has wrong data')
+        self.assertTrue((cols.a == COLUMN_A).all(), msg='column a changed')
+        self.assertIs(cols.hdus['T1'], cols.table, msg='rebuilt table not in HDUList')
+
+########################################################################
+#
+# tables read tests
+#
+
+
+class tables_read_info_test(unittest.TestCase):
+
+    """
+       Do the table shapes shown by info() follow changes of loaded
+       tables?
+    """
+
+    def info_shapes(self, tabs):
+        """
+           Return the shapes shown by tabs.info() keyed by table name
+        """
+        stdout = sys.stdout
+        sys.stdout = StringIO()
+        try:
+            tabs.info()
+            lines = sys.stdout.getvalue().splitlines()
+        finally:
+            sys.stdout = stdout
+        return dict((fields[1].strip(), fields[3].strip())
+                    for fields in [line.split('\t') for line in lines[1:]])
+
+    def test_read_info(self):
+        print(self.__class__.__name__)
+        tabs = tables(filename=TABLE1)
+        self.assertEqual(tabs.names, ['T1', 'T2'], msg='wrong table names')
+        self.assertEqual(self.info_shapes(tabs), {'T1': '(10, 2)', 'T2': '(10, 1)'}, msg='wrong table shapes')
+        cols = tabs['T1']
+        cols['c'] = COLUMN_A
+        self.assertEqual(self.info_shapes(tabs)['T1'], '(10, 3)', msg='shape of T1 not updated after column added')
+        del cols.a
+        self.assertEqual(self.info_shapes(tabs)['T1'], '(10, 2)', msg='shape of T1 not updated after column deleted')
+        self.assertEqual(self.info_shapes(tabs)['T2'], '(10, 1)', msg='wrong shape of unloaded T2')
+
+
+class tables_read_attribute_test(unittest.TestCase):
+
+    """
+       Are tables accessible as attributes, and do other attributes
+       raise AttributeError?
+    """
+
+    def test_read_attribute(self):
+        print(self.__class__.__name__)
+        tabs = tables(filename=TABLE1)
+        self.assertFalse(hasattr(tabs, '__deepcopy__'), msg='special attribute found')
+        self.assertEqual(tabs._tables, [], msg='tables loaded by special attribute lookup')
+        self.assertIs(tabs.T1, tabs['T1'], msg='T1 attribute is not table T1')
+        self.assertEqual(tabs.T2.names, ['table'], msg='T2 attribute has wrong columns')
+        self.assertFalse(hasattr(tabs, 'T3'), msg='missing table T3 found')
+        del tabs.T2
+        self.assertEqual(tabs.names, ['T1'], msg='table T2 not deleted')
+        self.assertFalse(hasattr(tabs, 'T2'), msg='deleted table T2 found')
+
+if __name__ == '__main__':
+    unittest.main()